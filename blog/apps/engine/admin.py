@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import IntegrityError
 from .models import Category, Post
 
 
@@ -9,15 +10,48 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
+    actions = ('publish', 'hide', 'revert_to_draft')
     date_hierarchy = 'published_at'
     filter_horizontal = ('categories',)
-    list_display = ('title', 'author', 'status', 'published_at', 'updated_at')
+    list_display = ('title', 'author', 'status', 'published_at', 'publish_at', 'updated_at')
     list_filter = ('status', 'published_at', 'updated_at')
     ordering = ('-updated_at',)
     prepopulated_fields = {'slug': ('title',)}
     search_fields = ('title', 'content')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index over search_fields rather than icontains scans.
+        if not search_term:
+            return queryset, False
+        return queryset.matching(search_term), False
+
     def save_model(self, request, obj, form, change):
         if not change:
             obj.author = request.user
         return super().save_model(request, obj, form, change)
+
+    @admin.action(description='Publish selected posts')
+    def publish(self, request, queryset):
+        self._set_status(request, queryset, Post.Status.PUBLISHED)
+
+    @admin.action(description='Hide selected posts')
+    def hide(self, request, queryset):
+        self._set_status(request, queryset, Post.Status.HIDDEN)
+
+    @admin.action(description='Revert selected posts to drafts')
+    def revert_to_draft(self, request, queryset):
+        self._set_status(request, queryset, Post.Status.DRAFT)
+
+    def _set_status(self, request, queryset, status):
+        # One set-based update, rather than a save() per post.
+        try:
+            count = queryset.set_status(status)
+        except IntegrityError:
+            self.message_user(
+                request,
+                'Nothing was changed: some of the posts would share a permalink with another '
+                'post published in the same month.',
+                messages.ERROR,
+            )
+            return
+        self.message_user(request, f'{count} post(s) marked as {status.label.lower()}.', messages.SUCCESS)
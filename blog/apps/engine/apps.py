@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EngineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog.apps.engine'
+
+    def ready(self):
+        from . import context_processors, pagecache, replicas, search, signals, summary  # noqa: F401 -- connects receivers
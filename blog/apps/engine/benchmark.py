@@ -0,0 +1,399 @@
+"""Reproducible benchmarks of the public site over synthetic corpora.
+
+build_corpus() fills an empty database with a seeded synthetic blog: posts of
+realistic lengths spread over a span of months, a mix of statuses and a few
+categories each. run_benchmarks() builds corpora of several sizes in turn and
+times every public URL, plus the sidebar context and post rendering, against
+each. Results are plain data, ready to be dumped as JSON and compared between
+commits; the benchmark management command does both against a throwaway test
+database.
+
+Each target is timed cold, with the cache cleared before every run, and warm,
+with the cache primed by a first run.
+
+run_server_benchmarks() compares the throughput of the WSGI and ASGI handlers
+serving the pages that have async views to slow clients, against the same
+corpora. The handlers are driven in process, with no server in front of them.
+
+"""
+import asyncio
+import datetime
+from io import BytesIO
+import itertools
+import platform
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+from asgiref.sync import async_to_sync
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.text import slugify
+from . import search, summary
+from .context_processors import get_archive_links
+from .models import Category, CategorySummary, Post
+from .pagination import encode_cursor
+from .views import AsyncViewMixin
+
+
+# The corpus is anchored to a fixed date rather than now, so it's the same every run.
+CORPUS_END = datetime.datetime(2021, 6, 30, tzinfo=datetime.timezone.utc)
+
+STATUS_WEIGHTS = {
+    Post.Status.PUBLISHED: 90,
+    Post.Status.DRAFT: 5,
+    Post.Status.HIDDEN: 5,
+}
+CATEGORIES_PER_POST = (0, 1, 1, 1, 2, 2, 3)
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+    'incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud '
+    'exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute irure '
+    'in reprehenderit voluptate velit esse cillum fugiat nulla pariatur excepteur sint '
+    'occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim id est '
+    'trail python baseball summit django river camp code release pitcher inning season'
+).split()
+
+
+#-- Corpus --#
+
+def build_corpus(post_count, category_count, seed=0, months=60):
+    """Fills the database with a synthetic blog built from the given seed.
+
+    Posts are spread uniformly over the given number of months up to CORPUS_END.
+    Their lengths follow a log-normal distribution around a few hundred words. Rows
+    are bulk inserted, so the derived data the model's receivers would maintain is
+    rebuilt afterwards. Returns a dict describing the corpus.
+
+    """
+    rng = random.Random(seed)
+    author, _ = User.objects.get_or_create(username='benchmark')
+    Category.objects.bulk_create(
+        Category(name=f'Category {i}', slug=f'category-{i}') for i in range(category_count)
+    )
+    category_ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+
+    posts = []
+    post_categories = []
+    span = months * 30 * 24 * 60 * 60
+    for i in range(post_count):
+        status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+        published_at = CORPUS_END - datetime.timedelta(seconds=rng.randrange(span))
+        title = ' '.join(rng.choices(WORDS, k=rng.randint(3, 8))).capitalize()
+        post = Post(
+            author=author,
+            title=title,
+            slug=f'{slugify(title)[:40]}-{i}',
+            content=_content(rng),
+            status=status,
+            published_at=None if status == Post.Status.DRAFT else published_at,
+        )
+        post.render_content()
+        post.path = post._build_path()
+        posts.append(post)
+        count = min(rng.choice(CATEGORIES_PER_POST), len(category_ids))
+        post_categories.append(rng.sample(category_ids, count))
+    Post.objects.bulk_create(posts, batch_size=500)
+
+    post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+    Post.categories.through.objects.bulk_create(
+        (
+            Post.categories.through(post_id=post_id, category_id=category_id)
+            for post_id, categories in zip(post_ids, post_categories)
+            for category_id in categories
+        ),
+        batch_size=500,
+    )
+
+    summary.rebuild()
+    if connection.vendor == 'sqlite':
+        search.rebuild_index(connection.alias)
+    return {
+        'posts': post_count,
+        'published_posts': Post.objects.published().count(),
+        'categories': category_count,
+        'months': months,
+        'seed': seed,
+    }
+
+
+def _content(rng):
+    word_count = min(max(int(rng.lognormvariate(5.8, 0.7)), 20), 5000)
+    paragraphs = []
+    while word_count > 0:
+        length = min(rng.randint(30, 120), word_count)
+        paragraphs.append(' '.join(rng.choices(WORDS, k=length)).capitalize() + '.')
+        word_count -= length
+    return '\n\n'.join(paragraphs)
+
+
+#-- Timing --#
+
+def run_benchmarks(sizes, category_count=20, seed=0, repeat=5):
+    """Times every target against a corpus of each size and returns the results.
+
+    Each corpus is built inside a transaction that's rolled back afterwards, so the
+    database is left as it was found.
+
+    """
+    environment = get_environment()
+    results = []
+    for size in sizes:
+        with transaction.atomic():
+            corpus = build_corpus(size, category_count, seed=seed)
+            for name, target in get_targets().items():
+                results.append({
+                    'name': name,
+                    'corpus': corpus,
+                    'cold': _measure(target, repeat, clear_cache=True),
+                    'warm': _measure(target, repeat, clear_cache=False),
+                })
+            transaction.set_rollback(True)
+    cache.clear()
+    return {'environment': environment, 'repeat': repeat, 'results': results}
+
+
+def get_targets():
+    """Gets a dict of callables to time, by name, for the corpus in the database."""
+    client = Client()
+    targets = {f'GET {url}': _url_target(client, url) for url in get_urls()}
+    targets['archive_links'] = get_archive_links
+
+    template = Template('{% load blogtools %}{% render_posts posts %}')
+    posts = list(Post.objects.published().prefetch_related('categories')[:10])
+    targets['render_posts'] = lambda: template.render(Context({'posts': posts}))
+    return targets
+
+
+def get_urls():
+    """Gets a URL for each public view, showing representative posts of the corpus."""
+    published = Post.objects.published()
+    newest = published.first()
+    if newest is None:
+        return []
+    published_at = timezone.localtime(newest.published_at)
+    # The second home page starts after the tenth post, if there are any more.
+    second_page = list(published[9:11])
+    category = (
+        CategorySummary.objects.filter(post_count__gt=0).order_by('-post_count')
+        .select_related('category').first()
+    )
+
+    urls = [
+        reverse('home'),
+        reverse('year_archive', kwargs={'year': published_at.strftime('%Y')}),
+        reverse('month_archive', kwargs={
+            'year': published_at.strftime('%Y'),
+            'month': published_at.strftime('%m'),
+        }),
+        newest.get_absolute_url(),
+        f"{reverse('search')}?q={WORDS[-1]}",
+        reverse('feed', kwargs={'format': 'atom'}),
+        reverse('feed', kwargs={'format': 'rss'}),
+        reverse('feed', kwargs={'format': 'atom', 'variant': 'full'}),
+        reverse('sitemap'),
+        reverse('sitemap_archives'),
+        reverse('sitemap_posts', kwargs={'shard': 0}),
+    ]
+    if len(second_page) == 2:
+        urls.append(f"{reverse('home')}?before={encode_cursor(second_page[0])}")
+    if category is not None:
+        slug = category.category.slug
+        urls.append(reverse('category_archive', kwargs={'slug': slug}))
+        urls.append(reverse('category_feed', kwargs={'slug': slug, 'format': 'atom'}))
+    return urls
+
+
+def _url_target(client, url):
+    def get():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f'GET {url} returned status {response.status_code}.')
+        # Streaming responses only do their work as they're consumed.
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return get
+
+
+def _measure(target, repeat, clear_cache):
+    if not clear_cache:
+        target()
+    timings = []
+    query_counts = []
+    for _ in range(repeat):
+        if clear_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            target()
+            timings.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(queries))
+    return {
+        'runs': repeat,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.mean(timings),
+        'max_ms': max(timings),
+        'queries': statistics.median(query_counts),
+    }
+
+
+#-- Servers --#
+
+def run_server_benchmarks(sizes, category_count=20, seed=0, **options):
+    """Compares the WSGI and ASGI handlers against a corpus of each size and returns the results.
+
+    The handlers' worker threads use connections of their own, which can only see
+    committed rows, so each corpus is committed and the database flushed afterwards.
+    Options are passed on to compare_servers().
+
+    """
+    results = []
+    for size in sizes:
+        corpus = build_corpus(size, category_count, seed=seed)
+        try:
+            results.append({'corpus': corpus, **compare_servers(get_server_urls(), **options)})
+        finally:
+            call_command('flush', verbosity=0, interactive=False)
+            cache.clear()
+    return results
+
+
+def get_server_urls():
+    """Gets the URLs from get_urls() of the pages served by async views under ASGI."""
+    return [
+        url for url in get_urls()
+        if issubclass(getattr(resolve(url.partition('?')[0]).func, 'view_class', object), AsyncViewMixin)
+    ]
+
+
+def compare_servers(urls, requests=200, threads=4, concurrency=100, client_delay=0.05):
+    """Measures the throughput of the WSGI and ASGI handlers serving the URLs to slow clients.
+
+    Every client takes client_delay seconds to read its response. A WSGI worker
+    thread is tied up for all that time, and `threads` of them share the requests;
+    under ASGI, up to `concurrency` requests at a time share the event loop. The
+    URLs are requested in turn, from a cache primed beforehand.
+
+    """
+    with override_settings(ROOT_URLCONF='blog.asgi_urls'):
+        asgi_handler = ASGIHandler()
+    wsgi_handler = WSGIHandler()
+    urls = list(itertools.islice(itertools.cycle(urls), requests))
+    for url in set(urls):
+        _serve_wsgi(wsgi_handler, url, 0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda url: _serve_wsgi(wsgi_handler, url, client_delay), urls))
+    wsgi_seconds = time.perf_counter() - start
+
+    with override_settings(ROOT_URLCONF='blog.asgi_urls'):
+        start = time.perf_counter()
+        async_to_sync(_serve_asgi_all)(asgi_handler, urls, concurrency, client_delay)
+        asgi_seconds = time.perf_counter() - start
+
+    return {
+        'urls': sorted(set(urls)),
+        'requests': len(urls),
+        'client_delay_ms': client_delay * 1000,
+        'wsgi': {'threads': threads, **_throughput(len(urls), wsgi_seconds)},
+        'asgi': {'concurrency': concurrency, **_throughput(len(urls), asgi_seconds)},
+    }
+
+
+def _serve_wsgi(handler, url, client_delay):
+    path, _, query = url.partition('?')
+    environ = {
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'HTTP_HOST': 'testserver',
+        'wsgi.input': BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(response)
+        time.sleep(client_delay)
+    finally:
+        # Closing the response finishes the request, closing its database connection.
+        response.close()
+    if not statuses[0].startswith('200'):
+        raise AssertionError(f'GET {url} returned status {statuses[0]} under WSGI.')
+
+
+async def _serve_asgi_all(handler, urls, concurrency, client_delay):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def serve(url):
+        async with semaphore:
+            await _serve_asgi(handler, url, client_delay)
+
+    await asyncio.gather(*map(serve, urls))
+
+
+async def _serve_asgi(handler, url, client_delay):
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif not message.get('more_body', False):
+            await asyncio.sleep(client_delay)
+
+    await handler(scope, receive, send)
+    if statuses[0] != 200:
+        raise AssertionError(f'GET {url} returned status {statuses[0]} under ASGI.')
+
+
+def _throughput(requests, seconds):
+    return {'seconds': seconds, 'requests_per_second': requests / seconds}
+
+
+def get_environment():
+    """Describes what the benchmarks ran on, including the commit when run from a git checkout."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'started_at': timezone.now().isoformat(timespec='seconds'),
+    }
@@ -1,22 +1,72 @@
 from collections import namedtuple
+import hashlib
+from django.core.cache import cache
+from django.dispatch import receiver
 from django.urls import reverse
-from .models import Category, Post
+from django.utils import timezone
+from .models import Category, MonthSummary
+from .servertiming import timed
+from .signals import published_set_changed
 
 
+ARCHIVE_LINKS_CACHE_KEY = 'engine:archive_links'
+
 MonthLink = namedtuple('MonthLink', ['url', 'date_obj'])
 
 
 def archive_links(request):
-    """Provides context for generating sidebar archive links."""
+    """Provides context for generating sidebar archive links.
+
+    The links only change along with the published set, so they are cached
+    indefinitely and dropped by invalidate_archive_links() when it changes.
+
+    """
+    with timed('archive-links'):
+        return get_archive_links()[1]
+
+
+def get_archive_links():
+    """Gets a (version, context, built_at) tuple for the sidebar archive links.
+
+    The version is a fingerprint of the links' content, so it only changes when a
+    rebuild actually produces different links. The links are rebuilt after every
+    change to the published set, so built_at is never earlier than the last one.
+
+    """
+    cached = cache.get(ARCHIVE_LINKS_CACHE_KEY)
+    if cached is None:
+        links = _build_archive_links()
+        cached = (_fingerprint(links), links, timezone.now())
+        cache.set(ARCHIVE_LINKS_CACHE_KEY, cached, None)
+    return cached
+
+
+@receiver(published_set_changed)
+def invalidate_archive_links(**kwargs):
+    cache.delete(ARCHIVE_LINKS_CACHE_KEY)
+
+
+def _build_archive_links():
+    # Both lists come from the archive summary. Its post counts aren't shown: they
+    # change with every post published, and the links' fingerprint is part of every
+    # cached page's key and ETag.
     return {
-        'all_categories': Category.objects.has_published_posts(),
+        'all_categories': list(Category.objects.summarized_as_published()),
         'all_months': [
             MonthLink(
                 url=reverse('month_archive', kwargs={
-                    'year': month.strftime('%Y'),
-                    'month': month.strftime('%m'),
+                    'year': summary.month.strftime('%Y'),
+                    'month': summary.month.strftime('%m'),
                 }),
-                date_obj=month,
-            ) for month in Post.objects.published_months()
+                date_obj=summary.month,
+            ) for summary in MonthSummary.objects.filter(post_count__gt=0)
         ],
-    }
\ No newline at end of file
+    }
+
+
+def _fingerprint(links):
+    content = (
+        [(c.pk, c.name, c.slug) for c in links['all_categories']],
+        [month.url for month in links['all_months']],
+    )
+    return hashlib.md5(repr(content).encode()).hexdigest()
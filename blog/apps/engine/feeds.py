@@ -0,0 +1,85 @@
+"""Atom and RSS feeds written out as they are generated.
+
+Django's feed generators collect every item before writing any XML. The feed
+classes here reuse their markup but write it one item at a time, so a view can
+stream a feed straight from a queryset iterator.
+
+"""
+from io import StringIO
+from django.utils import feedgenerator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+
+class StreamingFeedMixin:
+    """Adds stream() to a SyndicationFeed, taking the feed's update time up front.
+
+    Subclasses must define item_element and root_elements().
+
+    """
+    item_element = None
+
+    def __init__(self, *args, updated=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        # Root elements are written before any item is seen.
+        return self.updated or super().latest_post_date()
+
+    def root_elements(self):
+        """Gets the (name, attributes) pairs of the elements enclosing the items, outermost first."""
+        raise NotImplementedError('Subclasses of StreamingFeedMixin must define root_elements().')
+
+    def stream(self, items, encoding='utf-8'):
+        """Yields the feed's XML in chunks: the root elements, then each item as it's produced.
+
+        items is an iterable of dicts of add_item() arguments.
+
+        """
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        handler.startDocument()
+        root_elements = self.root_elements()
+        for name, attributes in root_elements:
+            handler.startElement(name, attributes)
+        self.add_root_elements(handler)
+        yield flush()
+
+        for kwargs in items:
+            self.add_item(**kwargs)
+            item = self.items.pop()
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield flush()
+
+        for name, _ in reversed(root_elements):
+            handler.endElement(name)
+        yield flush()
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    item_element = 'entry'
+
+    def root_elements(self):
+        return [('feed', self.root_attributes())]
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    item_element = 'item'
+
+    def root_elements(self):
+        return [('rss', self.rss_attributes()), ('channel', self.root_attributes())]
+
+
+FEED_CLASSES = {
+    'atom': AtomFeed,
+    'rss': RssFeed,
+}
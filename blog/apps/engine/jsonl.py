@@ -0,0 +1,241 @@
+"""Bulk export and import of categories and posts as JSON Lines.
+
+A dump holds one JSON object per line, tagged with its type: every category, then
+every post along with the slugs of its categories, e.g.
+
+    {"type": "category", "name": "Python", "slug": "python"}
+    {"type": "post", "title": "Hello", "slug": "hello", "author": "alice",
+     "content": "...", "status": "published",
+     "published_at": "2021-06-05T12:00:00+00:00", "publish_at": null,
+     "categories": ["python"]}
+
+(each on a single line). Both directions run in memory independent of the number
+of posts. Export streams rows through queryset iterators. Import reads a line at a
+time and writes posts in batches with bulk_create(), each batch in a transaction
+of its own, so a failure leaves the batches before it imported.
+
+Bulk inserts bypass Post.save() and its receivers, so import does their work for
+each batch: publication times follow the same status rules, published posts drop
+their schedules, and stored HTML, permalink paths, the search index, the archive
+summary and the change signals are all brought up to date.
+
+"""
+import datetime
+import json
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+from . import search, summary
+from .models import Category, Post
+from .signals import PublishedState, notify_published_posts_changed, notify_published_set_changed
+
+
+BATCH_SIZE = 500
+
+
+class InvalidRecord(ValueError):
+    """Raised for a line of a dump that can't be imported."""
+    def __init__(self, line_number, message):
+        super().__init__(f'Line {line_number}: {message}')
+        self.line_number = line_number
+
+
+#-- Export --#
+
+def export_lines(chunk_size=BATCH_SIZE):
+    """Yields every category, then every post, as lines of JSON."""
+    categories = Category.objects.order_by('pk').values_list('name', 'slug')
+    for name, slug in categories.iterator(chunk_size=chunk_size):
+        yield _dump({'type': 'category', 'name': name, 'slug': slug})
+
+    # Posts and their category links are both read in post order and merged as they go.
+    links = iter(
+        Post.categories.through.objects.order_by('post_id', 'category__slug')
+        .values_list('post_id', 'category__slug').iterator(chunk_size=chunk_size)
+    )
+    link = next(links, None)
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'title', 'slug', 'author__username', 'content', 'status', 'published_at', 'publish_at'
+    )
+    rows = posts.iterator(chunk_size=chunk_size)
+    for pk, title, slug, author, content, status, published_at, publish_at in rows:
+        category_slugs = []
+        while link is not None and link[0] <= pk:
+            if link[0] == pk:
+                category_slugs.append(link[1])
+            link = next(links, None)
+        yield _dump({
+            'type': 'post',
+            'title': title,
+            'slug': slug,
+            'author': author,
+            'content': content,
+            'status': Post.Status(status).name.lower(),
+            'published_at': published_at and published_at.isoformat(),
+            'publish_at': publish_at and publish_at.isoformat(),
+            'categories': category_slugs,
+        })
+
+
+def _dump(record):
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _parse_datetime(value):
+    if value is None:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+#-- Import --#
+
+def import_lines(lines, batch_size=BATCH_SIZE):
+    """Imports the categories and posts of a dump; returns the numbers of each imported.
+
+    Categories whose slugs already exist are left as they are, and posts are linked
+    to them. Posts are always created anew. Raises InvalidRecord for a bad line.
+
+    """
+    importer = _Importer(batch_size)
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            kind = record.pop('type')
+        except (ValueError, TypeError, AttributeError, KeyError):
+            raise InvalidRecord(line_number, 'Not a JSON object with a type.')
+        if kind == 'category':
+            importer.add_category(line_number, record)
+        elif kind == 'post':
+            importer.add_post(line_number, record)
+        else:
+            raise InvalidRecord(line_number, f'Unknown type {kind!r}.')
+    importer.flush()
+    return importer.category_count, importer.post_count
+
+
+class _Importer:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.using = router.db_for_write(Post)
+        # Only categories and authors are remembered, never posts.
+        self.category_ids = {}
+        self.author_ids = {}
+        self.categories = []
+        self.posts = []
+        self.category_count = 0
+        self.post_count = 0
+
+    def add_category(self, line_number, record):
+        try:
+            self.categories.append(Category(name=record['name'], slug=record['slug']))
+        except KeyError as exc:
+            raise InvalidRecord(line_number, f'Missing field {exc}.')
+        if len(self.categories) == self.batch_size:
+            self._flush_categories()
+
+    def add_post(self, line_number, record):
+        # Posts can only refer to categories imported before them.
+        self._flush_categories()
+        try:
+            post = Post(
+                author_id=self._author_id(record['author']),
+                title=record['title'],
+                slug=record['slug'],
+                content=record['content'],
+                status=Post.Status[record['status'].upper()],
+                published_at=_parse_datetime(record.get('published_at')),
+                publish_at=_parse_datetime(record.get('publish_at')),
+            )
+            category_ids = [self.category_ids[slug] for slug in record.get('categories', [])]
+        except KeyError as exc:
+            raise InvalidRecord(line_number, f'Missing field, or unknown value {exc}.')
+        except User.DoesNotExist:
+            raise InvalidRecord(line_number, f'Unknown author {record["author"]!r}.')
+        except (ValueError, AttributeError) as exc:
+            raise InvalidRecord(line_number, str(exc))
+        post._set_published_at()
+        if post.is_published:
+            post.publish_at = None
+        post.path = post._build_path()
+        post.render_content()
+        self.posts.append((line_number, post, record.get('categories', []), category_ids))
+        if len(self.posts) == self.batch_size:
+            self._flush_posts()
+
+    def flush(self):
+        self._flush_categories()
+        self._flush_posts()
+
+    def _author_id(self, username):
+        if username not in self.author_ids:
+            self.author_ids[username] = User.objects.get(username=username).pk
+        return self.author_ids[username]
+
+    def _flush_categories(self):
+        if not self.categories:
+            return
+        Category.objects.using(self.using).bulk_create(self.categories, ignore_conflicts=True)
+        slugs = [category.slug for category in self.categories]
+        self.category_ids.update(
+            Category.objects.using(self.using).filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+        self.category_count += len(self.categories)
+        self.categories = []
+
+    def _flush_posts(self):
+        if not self.posts:
+            return
+        posts = [post for _, post, _, _ in self.posts]
+        try:
+            self._insert_posts(posts)
+        except IntegrityError as exc:
+            raise InvalidRecord(self.posts[0][0], f'In the batch of posts starting here: {exc}')
+        self.post_count += len(posts)
+        self.posts = []
+
+    def _insert_posts(self, posts):
+        with transaction.atomic(using=self.using):
+            last_pk = Post.objects.using(self.using).order_by('-pk').values_list('pk', flat=True).first()
+            Post.objects.using(self.using).bulk_create(posts)
+            if posts[0].pk is None:
+                self._set_pks(posts, last_pk or 0)
+            Post.categories.through.objects.using(self.using).bulk_create(
+                Post.categories.through(post_id=post.pk, category_id=category_id)
+                for _, post, _, category_ids in self.posts
+                for category_id in category_ids
+            )
+            if connections[self.using].vendor == 'sqlite':
+                search.index_posts(posts, self.using)
+            self._update_published()
+
+    def _set_pks(self, posts, last_pk):
+        # Without ids returned by the insert, they're read back: they are assigned in
+        # insertion order, and a concurrent insert shows up as a mismatched count.
+        pks = list(
+            Post.objects.using(self.using).filter(pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        if len(pks) != len(posts):
+            raise InvalidRecord(self.posts[0][0], 'Posts were created concurrently with the import.')
+        for post, pk in zip(posts, pks):
+            post.pk = pk
+
+    def _update_published(self):
+        month_deltas = {}
+        category_deltas = {}
+        states = []
+        for _, post, category_slugs, category_ids in self.posts:
+            if not post.is_published:
+                continue
+            month = summary.month_of(post.published_at)
+            month_deltas[month] = month_deltas.get(month, 0) + 1
+            for category_id in category_ids:
+                category_deltas[category_id] = category_deltas.get(category_id, 0) + 1
+            states.append(PublishedState(post.published_at, post.slug, frozenset(category_slugs)))
+        if states:
+            summary.apply_deltas(month_deltas, category_deltas)
+            notify_published_posts_changed(states)
+            notify_published_set_changed()
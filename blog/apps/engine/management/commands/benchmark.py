@@ -0,0 +1,102 @@
+"""Benchmarks the public site over synthetic corpora of several sizes.
+
+Corpora are built in a throwaway test database, like the one the test suite
+uses, and timings are taken with a private local-memory cache, so neither the
+configured database nor a shared cache is touched. Results are written as JSON;
+see the benchmark module for what is timed and how. With --servers, the WSGI and
+ASGI handlers' throughput serving slow clients is compared too.
+
+"""
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from ... import benchmark
+
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Times every public URL against seeded synthetic corpora and writes the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+            help='Numbers of posts in the corpora to benchmark (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--categories', type=int, default=20,
+            help='Number of categories in each corpus (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed the corpora are generated from (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of timed runs of each target (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--servers', action='store_true',
+            help='Also compare the throughput of the WSGI and ASGI handlers.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of requests in each server comparison (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Number of WSGI worker threads (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Number of concurrent requests under ASGI (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Seconds each client takes to read a response (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='File to write the JSON results to, or - for standard output (default: %(default)s).'
+        )
+
+    def handle(self, *args, sizes, categories, seed, repeat, servers, output, **options):
+        if repeat < 1 or min(sizes) < 1:
+            raise CommandError('--sizes and --repeat must be at least 1.')
+        if min(options['requests'], options['threads'], options['concurrency']) < 1:
+            raise CommandError('--requests, --threads and --concurrency must be at least 1.')
+
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+        try:
+            with override_settings(
+                CACHES=BENCHMARK_CACHES,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                DEBUG=False,
+            ):
+                results = benchmark.run_benchmarks(sizes, categories, seed=seed, repeat=repeat)
+                if servers:
+                    results['servers'] = benchmark.run_server_benchmarks(
+                        sizes, categories, seed=seed,
+                        requests=options['requests'],
+                        threads=options['threads'],
+                        concurrency=options['concurrency'],
+                        client_delay=options['client_delay'],
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        content = json.dumps(results, indent=2)
+        if output == '-':
+            self.stdout.write(content)
+        else:
+            with open(output, 'w') as f:
+                f.write(content + '\n')
+            self.stderr.write(f'Wrote results for {len(results["results"])} target run(s) to {output}.')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from ... import jsonl
+
+
+class Command(BaseCommand):
+    help = 'Streams every category and post, with their category links, to a JSON Lines dump.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='File to write the dump to, or - for standard output (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=jsonl.BATCH_SIZE,
+            help='Number of rows to fetch per round trip (default: %(default)s).'
+        )
+
+    def handle(self, *args, output, chunk_size, **options):
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if output == '-':
+            for line in jsonl.export_lines(chunk_size=chunk_size):
+                self.stdout.write(line, ending='')
+            return
+        count = 0
+        with open(output, 'w', encoding='utf-8') as f:
+            for line in jsonl.export_lines(chunk_size=chunk_size):
+                f.write(line)
+                count += 1
+        self.stderr.write(f'Wrote {count} record(s) to {output}.')
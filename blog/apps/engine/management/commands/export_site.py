@@ -0,0 +1,232 @@
+"""Renders the public site to a directory of static HTML files.
+
+Pages are exported per page group (see pagecache): the home page, each year, month
+and category archive and each permalink slug. A listing's first page is written to
+<path>/index.html and every keyset page reached from it through its older/newer
+links to <path>/<query string>.html, so a server can map requests straight to files,
+e.g. with nginx:
+
+    location / { try_files $uri/$args.html $uri/index.html =404; }
+
+A manifest of each published post's updated_at and page groups is kept alongside the
+export. Re-runs only re-render the groups of posts that changed since, and remove the
+files of groups that no longer exist. Any change to the sidebar, which every page
+shows, forces a full export.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from pathlib import Path
+import re
+from urllib.parse import urlsplit
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve
+from ...context_processors import get_archive_links
+from ...models import Category, Post
+from ...pagecache import (
+    HOME_GROUP, category_group, groups_for_states, month_group, permalink_group, year_group
+)
+from ...signals import PublishedState
+
+
+MANIFEST_NAME = '.export-manifest.json'
+MANIFEST_VERSION = 1
+
+PAGE_LINK_RE = re.compile(r'href="(\?(?:before|after)=[\w-]+)" rel="(?:next|prev)"')
+
+
+class Command(BaseCommand):
+    help = 'Exports the public site to static HTML files, re-rendering only what changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to write the exported site to.')
+        parser.add_argument(
+            '--jobs', type=int, default=os.cpu_count(),
+            help='Number of worker processes rendering pages (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Re-render every page, ignoring the manifest of the previous export.'
+        )
+        parser.add_argument(
+            '--host', default=_default_host(),
+            help='Host name to render pages for (default: %(default)s).'
+        )
+
+    def handle(self, *args, output_dir, jobs, full, host, **options):
+        if jobs < 1:
+            raise CommandError('--jobs must be at least 1.')
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        previous = _read_manifest(output_dir)
+        exported = dict(previous['groups']) if previous else {}
+        archive_version = get_archive_links()[0]
+        posts, group_urls = _collect_published()
+
+        if full or previous is None or previous['archive_version'] != archive_version:
+            stale_groups = group_urls.keys() | exported.keys()
+        else:
+            stale_groups = set()
+            for pk in previous['posts'].keys() | posts.keys():
+                old, new = previous['posts'].get(pk), posts.get(pk)
+                if old != new:
+                    stale_groups.update(old[1] if old else ())
+                    stale_groups.update(new[1] if new else ())
+            # Groups showing nothing but changed posts may be gone entirely.
+            stale_groups.update(previous['groups'].keys() - group_urls.keys())
+
+        to_render = [(group, group_urls[group]) for group in sorted(stale_groups & group_urls.keys())]
+        rendered = dict(_render_groups(to_render, output_dir, jobs, host))
+
+        removed = 0
+        for group in stale_groups:
+            old_files = set(exported.pop(group, ()))
+            new_files = set(rendered.get(group, ()))
+            for name in old_files - new_files:
+                (output_dir / name).unlink(missing_ok=True)
+                removed += 1
+        exported.update(rendered)
+
+        _write_manifest(output_dir, {
+            'version': MANIFEST_VERSION,
+            'archive_version': archive_version,
+            'posts': posts,
+            'groups': exported,
+        })
+        page_count = sum(len(files) for files in rendered.values())
+        self.stdout.write(
+            f'Rendered {page_count} page(s) in {len(rendered)} group(s); '
+            f'removed {removed} stale file(s).'
+        )
+
+
+def _default_host():
+    for host in settings.ALLOWED_HOSTS:
+        if not host.startswith(('.', '*')):
+            return host
+    return 'localhost'
+
+
+#-- Manifest --#
+
+def _read_manifest(output_dir):
+    try:
+        manifest = json.loads((output_dir / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    manifest['posts'] = {pk: tuple(entry) for pk, entry in manifest['posts'].items()}
+    return manifest
+
+
+def _write_manifest(output_dir, manifest):
+    _write_atomic(output_dir / MANIFEST_NAME, json.dumps(manifest, indent=1).encode())
+
+
+def _collect_published():
+    """Gets the manifest entry of every published post and the first URLs of every page group.
+
+    Manifest entries map post ids, as strings to match JSON, to an (updated_at,
+    sorted page groups) tuple.
+
+    """
+    category_slugs = {}
+    through = Post.categories.through.objects.filter(post__status=Post.Status.PUBLISHED)
+    for post_id, slug in through.values_list('post_id', 'category__slug').iterator():
+        category_slugs.setdefault(post_id, set()).add(slug)
+
+    posts = {}
+    group_urls = {HOME_GROUP: ['/']}
+    published = Post.objects.published().only('id', 'slug', 'path', 'published_at', 'updated_at')
+    for post in published.order_by('pk').iterator():
+        state = PublishedState(post.published_at, post.slug, category_slugs.get(post.pk, ()))
+        groups = groups_for_states([state])
+        posts[str(post.pk)] = (post.updated_at.isoformat(), sorted(groups))
+        group_urls.setdefault(permalink_group(post.slug), []).append(post.get_absolute_url())
+
+    for month in Post.objects.published_months():
+        group_urls[month_group(month.year, month.month)] = [month.strftime('/%Y/%m/')]
+        group_urls[year_group(month.year)] = [month.strftime('/%Y/')]
+    for category in Category.objects.has_published_posts():
+        group_urls[category_group(category.slug)] = [category.get_absolute_url()]
+    return posts, group_urls
+
+
+#-- Rendering --#
+
+def _render_groups(groups, output_dir, jobs, host):
+    """Renders each (group, urls) pair, yielding (group, files written) pairs as they finish."""
+    tasks = [(group, urls, str(output_dir), host) for group, urls in groups]
+    if jobs == 1 or len(tasks) < 2:
+        yield from map(_render_group, tasks)
+        return
+
+    # Workers must open their own connections rather than share the parent's.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+        yield from executor.map(_render_group, tasks, chunksize=8)
+
+
+def _init_worker():
+    # Forked workers inherit a configured Django; spawned ones must set it up.
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _render_group(task):
+    """Renders a group's pages, following pagination links, and returns the files written."""
+    group, urls, output_dir, host = task
+    factory = RequestFactory(HTTP_HOST=host)
+    pending = list(urls)
+    seen = set(pending)
+    files = []
+    while pending:
+        url = pending.pop()
+        content = _render_page(factory, url)
+        name = _file_name(url)
+        _write_atomic(Path(output_dir) / name, content)
+        files.append(name)
+
+        path = urlsplit(url).path
+        for query in PAGE_LINK_RE.findall(content.decode()):
+            link = path + query.replace('&amp;', '&')
+            if link not in seen:
+                seen.add(link)
+                pending.append(link)
+    return group, sorted(files)
+
+
+def _render_page(factory, url):
+    request = factory.get(url)
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        raise CommandError(f'Rendering {url} failed with status {response.status_code}.')
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def _file_name(url):
+    parts = urlsplit(url)
+    directory = parts.path.strip('/')
+    name = f'{parts.query}.html' if parts.query else 'index.html'
+    return f'{directory}/{name}' if directory else name
+
+
+def _write_atomic(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
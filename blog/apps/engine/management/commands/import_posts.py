@@ -0,0 +1,33 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from ... import jsonl
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports categories and posts from a JSON Lines dump written by export_posts, '
+        'in batches of bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='File to read the dump from, or - for standard input (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=jsonl.BATCH_SIZE,
+            help='Number of posts to insert per transaction (default: %(default)s).'
+        )
+
+    def handle(self, *args, input, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        try:
+            if input == '-':
+                counts = jsonl.import_lines(sys.stdin, batch_size=batch_size)
+            else:
+                with open(input, encoding='utf-8') as f:
+                    counts = jsonl.import_lines(f, batch_size=batch_size)
+        except jsonl.InvalidRecord as exc:
+            raise CommandError(f'{exc} Posts in earlier batches were imported.')
+        self.stdout.write('Imported {} category record(s) and {} post(s).'.format(*counts))
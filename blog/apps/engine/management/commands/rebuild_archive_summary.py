@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from ... import summary
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the month and category summaries of published posts from scratch.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            summary.rebuild()
+        self.stdout.write('Rebuilt the archive summaries.')
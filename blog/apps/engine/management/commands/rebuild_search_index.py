@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from ... import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the SQLite full-text search index from scratch. PostgreSQL maintains '
+        'its index itself, so there is nothing to do there.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to rebuild the index of (default: %(default)s).'
+        )
+
+    def handle(self, *args, database, **options):
+        if connections[database].vendor != 'sqlite':
+            self.stdout.write('The search index is maintained by the database; nothing to do.')
+            return
+        with transaction.atomic(using=database):
+            search.rebuild_index(database)
+        self.stdout.write('Rebuilt the search index.')
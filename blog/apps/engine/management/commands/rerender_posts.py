@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from ...models import Post
+from ...rendering import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-renders the stored HTML of posts rendered by an outdated renderer version, '
+        'or of every post with --all.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='render_all',
+            help='Re-render every post regardless of the renderer version it was rendered with.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of posts to update per query (default: %(default)s).'
+        )
+
+    def handle(self, *args, render_all=False, batch_size=500, **options):
+        posts = Post.objects.all() if render_all else Post.objects.stale_renders()
+        count = posts.rerender(batch_size=batch_size)
+        self.stdout.write(f'Rendered {count} post(s) with renderer version {RENDERER_VERSION}.')
@@ -0,0 +1,64 @@
+"""Publishes scheduled posts as they come due.
+
+The scheduler sleeps until the next post is due, found by an indexed lookup of
+the earliest pending publish_at, then publishes every post due by then in a
+single transaction, so caches are invalidated once per batch. Posts scheduled
+while it sleeps, to come due sooner than it wakes, are picked up within
+--max-sleep seconds; each wake-up costs that one indexed query. A failed check
+is logged and retried after --max-sleep seconds, rather than ending the loop.
+
+"""
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from ...models import Post
+
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Publishes scheduled posts as they come due, sleeping until the next one is.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Most seconds to sleep between checks for newly scheduled posts (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Publish the posts already due and exit.'
+        )
+
+    def handle(self, *args, max_sleep, once, **options):
+        if max_sleep <= 0:
+            raise CommandError('--max-sleep must be positive.')
+        try:
+            while True:
+                try:
+                    self.publish_due()
+                    sleep = self.get_sleep(max_sleep)
+                except Exception:
+                    if once:
+                        raise
+                    logger.exception('Publishing scheduled posts failed.')
+                    sleep = max_sleep
+                if once:
+                    return
+                time.sleep(sleep)
+                # Connections may have timed out or gone stale while sleeping.
+                close_old_connections()
+        except KeyboardInterrupt:
+            pass
+
+    def publish_due(self):
+        count = Post.objects.publish_due()
+        if count:
+            self.stdout.write(f'Published {count} scheduled post(s).')
+
+    def get_sleep(self, max_sleep):
+        next_due = Post.objects.next_due()
+        if next_due is None:
+            return max_sleep
+        return min(max((next_due - timezone.now()).total_seconds(), 0), max_sleep)
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0004_auto_20210912_1256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 2)), fields=['-published_at', '-id'], name='engine_post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['slug', 'published_at'], name='engine_post_slug_pub_idx'),
+        ),
+    ]
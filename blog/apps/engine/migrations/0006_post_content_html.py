@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:44
+
+from django.db import migrations, models
+from blog.apps.engine.rendering import RENDERER_VERSION, render_content
+
+
+def render_existing_posts(apps, schema_editor):
+    Post = apps.get_model('engine', 'Post')
+    posts = Post.objects.only('id', 'content').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        post.content_html = render_content(post.content)
+        post.content_html_version = RENDERER_VERSION
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['content_html', 'content_html_version'])
+            batch = []
+    Post.objects.bulk_update(batch, ['content_html', 'content_html_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0005_post_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
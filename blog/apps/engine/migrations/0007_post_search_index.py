@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE engine_post_fts USING fts5(title, content, tokenize = 'porter unicode61')",
+    "INSERT INTO engine_post_fts (rowid, title, content) SELECT id, title, content FROM engine_post",
+]
+SQLITE_BACKWARD = ["DROP TABLE engine_post_fts"]
+
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX engine_post_search_idx ON engine_post "
+    "USING GIN (to_tsvector('english', engine_post.title || ' ' || engine_post.content))",
+]
+POSTGRESQL_BACKWARD = ["DROP INDEX engine_post_search_idx"]
+
+
+def _run_for_vendor(statements):
+    def _run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return _run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0006_post_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            _run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
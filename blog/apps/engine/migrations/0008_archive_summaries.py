@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:53
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    Category = apps.get_model('engine', 'Category')
+    CategorySummary = apps.get_model('engine', 'CategorySummary')
+    MonthSummary = apps.get_model('engine', 'MonthSummary')
+    Post = apps.get_model('engine', 'Post')
+    published = 2
+
+    months = (
+        Post.objects.filter(status=published)
+        .annotate(month=TruncMonth('published_at', output_field=models.DateField()))
+        .order_by().values('month').annotate(post_count=Count('id'))
+    )
+    MonthSummary.objects.bulk_create(MonthSummary(**row) for row in months)
+
+    categories = Category.objects.annotate(
+        published_count=Count('posts', filter=Q(posts__status=published))
+    ).filter(published_count__gt=0).values_list('pk', 'published_count')
+    CategorySummary.objects.bulk_create(
+        CategorySummary(category_id=pk, post_count=count) for pk, count in categories
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='engine.category')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'category summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
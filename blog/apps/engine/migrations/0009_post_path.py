@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:56
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _build_path(slug, published_at):
+    return f'/{timezone.localtime(published_at):%Y/%m}/{slug}/'
+
+
+def set_existing_paths(apps, schema_editor):
+    Post = apps.get_model('engine', 'Post')
+    posts = Post.objects.filter(published_at__isnull=False).only('id', 'slug', 'published_at').order_by('pk')
+    # Every permalink as it stands, so renamed posts can steer clear of all of them.
+    taken = set()
+    for slug, published_at in posts.values_list('slug', 'published_at').iterator(chunk_size=500):
+        taken.add(_build_path(slug, published_at))
+
+    assigned = set()
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        path = _build_path(post.slug, post.published_at)
+        if path in assigned:
+            # Of posts sharing a permalink, which could never be resolved, the first
+            # keeps it and the others get their slugs suffixed with the lowest free number.
+            base = post.slug[:Post._meta.get_field('slug').max_length - 4]
+            number = 2
+            while _build_path(f'{base}-{number}', post.published_at) in taken:
+                number += 1
+            post.slug = f'{base}-{number}'
+            path = _build_path(post.slug, post.published_at)
+            taken.add(path)
+        assigned.add(path)
+        post.path = path
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['slug', 'path'])
+            batch = []
+    Post.objects.bulk_update(batch, ['slug', 'path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0008_archive_summaries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='engine_post_slug_pub_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='path',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(set_existing_paths, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='path',
+            field=models.CharField(editable=False, max_length=255, null=True, unique=True),
+        ),
+    ]
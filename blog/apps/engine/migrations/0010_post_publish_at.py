@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0009_post_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='publish_at',
+            field=models.DateTimeField(blank=True, help_text='Leave the post unpublished and it will be published at this time.', null=True, verbose_name='scheduled publication time'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('publish_at__isnull', False)), fields=['publish_at'], name='engine_post_publish_at_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:25
+
+from django.db import migrations, models
+from blog.apps.engine.rendering import render_excerpt
+
+
+def excerpt_existing_posts(apps, schema_editor):
+    Post = apps.get_model('engine', 'Post')
+    posts = Post.objects.only('id', 'content_html').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        post.excerpt_html, post.excerpt_truncated = render_excerpt(post.content_html)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt_html', 'excerpt_truncated'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt_html', 'excerpt_truncated'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0010_post_publish_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(excerpt_existing_posts, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,25 @@
+import logging
 from django.contrib.auth.models import User
-from django.db import models
-from django.urls import reverse
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce, Concat
+from django.core.exceptions import ValidationError
+from django.urls import get_script_prefix, reverse
 from django.utils import timezone
+from . import search
+from .rendering import RENDERER_VERSION, render_content, render_excerpt
+
+
+logger = logging.getLogger(__name__)
 
 
 class CategoryQuerySet(models.QuerySet):
     def has_published_posts(self):
         return self.filter(posts__status=Post.Status.PUBLISHED).distinct()
 
+    def summarized_as_published(self):
+        """Filters to categories with published posts, as read from the archive summary."""
+        return self.filter(summary__post_count__gt=0)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -33,6 +45,143 @@ class PostQuerySet(models.QuerySet):
     def published_months(self):
         return self.published().dates('published_at', 'month', order='DESC')
 
+    def matching(self, query):
+        """Filters to posts matching a full-text search query, in no particular order."""
+        return search.filter_matching(self, query)
+
+    def search(self, query):
+        """Filters to posts matching a full-text search query, ranked best match first."""
+        return search.rank_matching(self, query)
+
+    def scheduled(self):
+        """Filters to unpublished posts scheduled to be published."""
+        return self.filter(publish_at__isnull=False).exclude(status=self.model.Status.PUBLISHED)
+
+    def next_due(self):
+        """Gets the earliest time a scheduled post is due to be published, or None."""
+        return self.scheduled().order_by('publish_at').values_list('publish_at', flat=True).first()
+
+    def publish_due(self, now=None):
+        """Publishes every scheduled post due by now, as one batch; returns how many were published.
+
+        A post whose permalink would collide with another post's can't be published,
+        and would fail the whole batch; it's logged and unscheduled instead, left
+        for its author to rename.
+
+        """
+        due = self.scheduled().filter(publish_at__lte=now or timezone.now())
+        stamped = timezone.now()
+        # Posts never published take their paths from their slugs as they're stamped.
+        paths = {
+            pk: self.model(slug=slug, published_at=stamped)._build_path()
+            for pk, slug in due.filter(published_at__isnull=True).order_by('pk').values_list('pk', 'slug')
+        }
+        taken = set(self.model.objects.filter(path__in=paths.values()).values_list('path', flat=True))
+        conflicting = []
+        for pk, path in paths.items():
+            if path in taken:
+                conflicting.append(pk)
+            taken.add(path)
+        if conflicting:
+            logger.warning(
+                'Unscheduled posts %s, whose permalinks are already taken.',
+                ', '.join(map(str, conflicting)), extra={'post_ids': conflicting},
+            )
+            self.model.objects.filter(pk__in=conflicting).update(publish_at=None)
+        return due.exclude(pk__in=conflicting).set_status(self.model.Status.PUBLISHED, now=stamped)
+
+    def stale_renders(self):
+        """Filters to posts whose stored HTML came from an outdated renderer."""
+        return self.filter(content_html_version__lt=RENDERER_VERSION)
+
+    def rerender(self, batch_size=500):
+        """Re-renders the stored HTML of every post in the queryset, in batches.
+        
+        Rows are updated directly rather than saved, so updated_at and everything
+        keyed on it are left alone. Returns the number of posts rendered.
+
+        """
+        count = 0
+        batch = []
+        for post in self.only('id', 'content').order_by('pk').iterator(chunk_size=batch_size):
+            post.render_content()
+            batch.append(post)
+            if len(batch) == batch_size:
+                count += self._rerender_batch(batch)
+                batch = []
+        return count + self._rerender_batch(batch)
+
+    def _rerender_batch(self, batch):
+        self.model.objects.bulk_update(batch, self.model.RENDERED_FIELDS)
+        return len(batch)
+
+    def set_status(self, status, now=None):
+        """Moves every post in the queryset to a status in one UPDATE; returns how many moved.
+
+        Publication times follow the rules of Post._set_published_at(): publishing
+        stamps posts never published with the current time, reverting to DRAFT clears
+        it and hiding keeps it. Posts already in the status are left alone. The archive
+        summary is kept current, and the posts entering or leaving the published set
+        are announced together in a single notification once the transaction commits.
+        Published posts are no longer scheduled, as in Post.save(). Posts are stamped
+        with `now`, if given, rather than the current time.
+
+        """
+        from . import signals, summary
+
+        status = self.model.Status(status)
+        now = now or timezone.now()
+        changing = self.exclude(status=status)
+        if status == self.model.Status.PUBLISHED:
+            # Every post stamped now shares its permalink's year and month.
+            placeholder = 'slug-placeholder'
+            prefix, suffix = self.model(slug=placeholder, published_at=now)._build_path().split(placeholder)
+            values = {
+                'publish_at': None,
+                'published_at': Coalesce('published_at', models.Value(now)),
+                'path': models.Case(
+                    models.When(published_at__isnull=True, then=Concat(
+                        models.Value(prefix), 'slug', models.Value(suffix),
+                        output_field=models.CharField(),
+                    )),
+                    default='path',
+                ),
+            }
+            crossing = changing
+        elif status == self.model.Status.DRAFT:
+            values = {'published_at': None, 'path': None}
+            crossing = changing.published()
+        else:
+            values = {}
+            crossing = changing.published()
+
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            # Posts entering or leaving the published set, as they are before the update.
+            rows = list(crossing.order_by().values_list('pk', 'published_at', 'slug'))
+            links = self.model.categories.through.objects.filter(post__in=crossing.order_by().values('pk'))
+            categories = {}
+            for post_id, *category in links.values_list('post_id', 'category_id', 'category__slug'):
+                categories.setdefault(post_id, []).append(category)
+            count = changing.update(status=status, updated_at=now, **values)
+
+            sign = 1 if status == self.model.Status.PUBLISHED else -1
+            month_deltas = {}
+            category_deltas = {}
+            states = []
+            for pk, published_at, slug in rows:
+                published_at = published_at or now
+                month = summary.month_of(published_at)
+                month_deltas[month] = month_deltas.get(month, 0) + sign
+                for category_id, _ in categories.get(pk, ()):
+                    category_deltas[category_id] = category_deltas.get(category_id, 0) + sign
+                category_slugs = frozenset(category_slug for _, category_slug in categories.get(pk, ()))
+                states.append(signals.PublishedState(published_at, slug, category_slugs))
+            if states:
+                summary.apply_deltas(month_deltas, category_deltas)
+                signals.notify_published_posts_changed(states)
+                signals.notify_published_set_changed()
+        return count
+
 
 class Post(models.Model):
     """Model representing a post to the blog."""
@@ -46,30 +195,69 @@ class Post(models.Model):
     slug = models.SlugField()
     categories = models.ManyToManyField(Category, blank=True, related_name='posts')
     content = models.TextField()
+    content_html = models.TextField(editable=False, default='')
+    content_html_version = models.PositiveSmallIntegerField(editable=False, default=0)
+    # The start of content_html shown by pages listing posts, which never load the full content.
+    excerpt_html = models.TextField(editable=False, default='')
+    excerpt_truncated = models.BooleanField(editable=False, default=False)
     status = models.SmallIntegerField(choices=Status.choices, default=Status.DRAFT)
     published_at = models.DateTimeField(editable=False, null=True)
+    # When the scheduler is to publish the post; cleared once it's published.
+    publish_at = models.DateTimeField(
+        'scheduled publication time', null=True, blank=True,
+        help_text='Leave the post unpublished and it will be published at this time.',
+    )
+    # The canonical permalink path, without any script prefix; set along with published_at.
+    path = models.CharField(max_length=255, editable=False, null=True, unique=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     objects = PostQuerySet.as_manager()
 
+    # The fields set by render_content().
+    RENDERED_FIELDS = ['content_html', 'content_html_version', 'excerpt_html', 'excerpt_truncated']
+
+    # Field values as of the last load from or save to the database; see from_db()
+    # and refresh_from_db().
+    # Never mutated in place, so sharing the empty default between instances is safe.
+    _loaded_values = {}
+
     class Meta:
         ordering = ('-published_at',)
+        indexes = [
+            # Serves every public listing: status=PUBLISHED, newest first, with the id
+            # tie-breaker used by keyset pagination. 2 is Status.PUBLISHED, which
+            # isn't in scope here.
+            models.Index(
+                fields=['-published_at', '-id'],
+                condition=models.Q(status=2),
+                name='engine_post_published_idx',
+            ),
+            # Serves the scheduler's next due lookup; only pending schedules are indexed.
+            models.Index(
+                fields=['publish_at'],
+                condition=models.Q(publish_at__isnull=False),
+                name='engine_post_publish_at_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
     def get_absolute_url(self):
-        if self.published_at is None:
+        path = self.path or self._build_path()
+        if path is None:
             raise NotImplementedError('TODO')
-            
-        return reverse(
-            'permalink',
-            kwargs={
-                'year': self.published_at.strftime('%Y'),
-                'month': self.published_at.strftime('%m'),
-                'slug': self.slug,
-            }
-        )
+        return get_script_prefix() + path[1:]
 
     @property
     def is_draft(self):
@@ -81,14 +269,110 @@ class Post(models.Model):
         """Gets whether or not this post is published to the site."""
         return self.status == Post.Status.PUBLISHED
 
+    @property
+    def was_published(self):
+        """Gets whether or not this post was published as of its last load or save."""
+        return self._loaded_values.get('status') == Post.Status.PUBLISHED
+
+    @property
+    def published_state_changed(self):
+        """Gets whether or not saving this post would alter the set of published posts.
+        
+        That is the case when the post enters or leaves the published set or when a
+        published post's publication time moves.
+
+        """
+        if not (self.is_published or self.was_published):
+            return False
+        return (
+            self.is_published != self.was_published
+            or self.published_at != self._loaded_values.get('published_at')
+        )
+
+    def clean(self):
+        if self.is_published and self.publish_at is not None:
+            raise ValidationError({
+                'publish_at': 'Only unpublished posts can be scheduled; leave the status as draft or hidden.',
+            })
+        if self.published_at is not None:
+            published_at = self.published_at
+        elif self.is_published:
+            published_at = timezone.now()
+        elif self.publish_at is not None:
+            # The scheduler stamps the post as it publishes it, once due.
+            published_at = max(self.publish_at, timezone.now())
+        else:
+            published_at = None
+        path = self._build_path(published_at)
+        if path is not None and Post.objects.exclude(pk=self.pk).filter(path=path).exists():
+            raise ValidationError({
+                'slug': 'Another post published in the same month already uses this slug.',
+            })
+
     def save(self, *args, **kwargs):
         """
-        Synchronizes the post's publication time with model state in addition to standard 
-        Model.save() behavior.
+        Synchronizes the post's publication time, permalink path and rendered content with 
+        model state in addition to standard Model.save() behavior.
         
         """
         self._set_published_at()
-        super().save(*args, **kwargs)
+        if self.is_published:
+            self.publish_at = None
+        self.path = self._build_path()
+        self.render_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'content' in update_fields:
+                update_fields |= set(Post.RENDERED_FIELDS)
+            if {'status', 'slug', 'published_at'} & update_fields:
+                update_fields |= {'published_at', 'path'}
+            if 'status' in update_fields:
+                update_fields.add('publish_at')
+            kwargs['update_fields'] = update_fields
+        # Receivers maintaining derived tables must commit or roll back with the post.
+        using = kwargs.get('using') or router.db_for_write(Post, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
+
+    def render_content(self):
+        """Renders the post's content, and its excerpt, to HTML with the current renderer."""
+        self.content_html = render_content(self.content)
+        self.content_html_version = RENDERER_VERSION
+        self.excerpt_html, self.excerpt_truncated = render_excerpt(self.content_html)
+
+    def _remember_values(self, fields=None):
+        """Records the values just saved or reloaded as the post's loaded values.
+
+        Only the given fields are recorded, by name or attname, or else every one
+        not deferred.
+
+        """
+        current = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (fields is None or field.name in fields or field.attname in fields)
+        }
+        self._loaded_values = {**self._loaded_values, **current}
+
+    def _build_path(self, published_at=None):
+        """Builds the permalink path for the post's slug and publication time, if any.
+
+        Months are taken in the current time zone, as the archive views bound them.
+
+        """
+        published_at = published_at or self.published_at
+        if published_at is None:
+            return None
+        published_at = timezone.localtime(published_at)
+        url = reverse('permalink', kwargs={
+            'year': published_at.strftime('%Y'),
+            'month': published_at.strftime('%m'),
+            'slug': self.slug,
+        })
+        return '/' + url[len(get_script_prefix()):]
 
     def _set_published_at(self):
         """Sets the post's publication time to an appropriate value based on its current status.
@@ -110,3 +394,35 @@ class Post(models.Model):
             self.published_at = timezone.now()
         elif self.is_draft:
             self.published_at = None
+
+
+
+class MonthSummary(models.Model):
+    """Denormalized count of the published posts in a month of the current time zone.
+
+    Maintained incrementally by the receivers in the summary module; rows whose
+    count drops to zero are kept and filtered out when read.
+
+    """
+    month = models.DateField(unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-month',)
+
+    def __str__(self):
+        return f'{self.month:%B %Y} ({self.post_count})'
+
+
+class CategorySummary(models.Model):
+    """Denormalized count of the published posts in a category."""
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, primary_key=True, related_name='summary'
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'category summaries'
+
+    def __str__(self):
+        return f'{self.category} ({self.post_count})'
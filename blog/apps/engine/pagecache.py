@@ -0,0 +1,236 @@
+"""Full-page cache for the public views, invalidated precisely by page group.
+
+Every public page belongs to one page group naming the posts it can show: the home
+page, a year, a month, a category or a permalink slug. Each group has a version
+token in the cache, and a page is cached under a key derived from its URL, the
+tokens of its groups and the version of the sidebar all pages share. Purging a
+group just drops its token, so every page in it -- including each of its keyset
+pages -- misses from then on, without touching pages in other groups and without
+relying on expiry. Pages and tokens do expire eventually, but only so orphaned
+ones age out.
+
+Pages are stored along with their gzip and, if the brotli package is installed,
+Brotli encodings, compressed once as they're cached. A cache hit is served in the
+best encoding the request's Accept-Encoding allows, as stored, so hits cost no
+compression; GZipMiddleware, if enabled, leaves such responses alone.
+
+"""
+import gzip
+import hashlib
+from urllib.parse import urlencode
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from .context_processors import ARCHIVE_LINKS_CACHE_KEY, get_archive_links
+from .signals import published_posts_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PAGE_KEY_PREFIX = 'engine:page:'
+GROUP_KEY_PREFIX = 'engine:pagegroup:'
+
+HOME_GROUP = 'home'
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+# Bump whenever the format of cached pages changes, orphaning every cached page.
+PAGE_VERSION = 2
+
+# Pages are keyed on everything they show, so they're never stale; this only lets
+# orphaned ones, and the tokens of groups no longer visited, age out.
+PAGE_TIMEOUT = 30 * 24 * 60 * 60
+
+# The query parameters the cached views read. Page keys leave out any others, so
+# arbitrary query strings can't fill the cache with copies of the same page.
+PAGE_PARAMS = ('before', 'after')
+
+# Pages shorter than this, in bytes, aren't worth compressing, as in GZipMiddleware.
+MIN_COMPRESSED_LENGTH = 200
+
+
+#-- Page groups --#
+
+def year_group(year):
+    return f'year:{int(year):04d}'
+
+
+def month_group(year, month):
+    return f'month:{int(year):04d}-{int(month):02d}'
+
+
+def category_group(slug):
+    return f'category:{slug}'
+
+
+def permalink_group(slug):
+    return f'permalink:{slug}'
+
+
+def groups_for_states(states):
+    """Gets the page groups showing a post in any of the given PublishedStates."""
+    groups = set()
+    for state in states:
+        # Archive views bound months in the current time zone, so group by it too.
+        published_at = timezone.localtime(state.published_at)
+        groups.update([
+            HOME_GROUP,
+            year_group(published_at.year),
+            month_group(published_at.year, published_at.month),
+            permalink_group(state.slug),
+        ])
+        groups.update(category_group(slug) for slug in state.category_slugs)
+    return groups
+
+
+def purge_groups(groups):
+    """Drops the version tokens of page groups, orphaning every page cached under them."""
+    cache.delete_many([GROUP_KEY_PREFIX + group for group in groups])
+
+
+@receiver(published_posts_changed)
+def purge_pages_showing_posts(states, **kwargs):
+    purge_groups(groups_for_states(states))
+
+
+#-- Cached pages --#
+
+def is_cacheable_request(request):
+    """Gets whether a request may be answered from, and its response stored in, the cache.
+
+    Only anonymous reads qualify. Anyone with a session -- editors, in practice --
+    always sees freshly rendered pages.
+
+    """
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def get_page_key(request, groups):
+    """Builds the cache key for a request's page from the current versions of its groups."""
+    group_keys = [GROUP_KEY_PREFIX + group for group in sorted(groups)]
+    found = cache.get_many([*group_keys, ARCHIVE_LINKS_CACHE_KEY])
+
+    missing = {key: uuid.uuid4().hex for key in group_keys if key not in found}
+    if missing:
+        cache.set_many(missing, PAGE_TIMEOUT)
+    archive_version = (
+        found[ARCHIVE_LINKS_CACHE_KEY] if ARCHIVE_LINKS_CACHE_KEY in found
+        else get_archive_links()
+    )[0]
+
+    versions = [found.get(key) or missing[key] for key in group_keys]
+    return _page_key(request, archive_version, versions)
+
+
+def peek_page(request, groups):
+    """Gets a request's cached page as a response, or None, without touching the database.
+
+    Unlike get_page_key(), this gives up rather than building a missing sidebar or
+    group version, either of which means the page can't be cached anyway.
+
+    """
+    group_keys = [GROUP_KEY_PREFIX + group for group in sorted(groups)]
+    found = cache.get_many([*group_keys, ARCHIVE_LINKS_CACHE_KEY])
+    if len(found) < len(group_keys) + 1:
+        return None
+    versions = [found[key] for key in group_keys]
+    return get_page(_page_key(request, found[ARCHIVE_LINKS_CACHE_KEY][0], versions), request)
+
+
+def _page_key(request, archive_version, versions):
+    params = urlencode([(name, request.GET[name]) for name in PAGE_PARAMS if name in request.GET])
+    url = request.build_absolute_uri(request.path) + (f'?{params}' if params else '')
+    fingerprint = '|'.join([str(PAGE_VERSION), url, archive_version, *versions])
+    return PAGE_KEY_PREFIX + hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def get_page(key, request):
+    """Gets a cached page as a response in the request's best accepted encoding, or None."""
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content, headers, encodings = cached
+    encoding = next(
+        (encoding for encoding in _accepted_encodings(request) if encoding in encodings), None
+    )
+    response = HttpResponse(encodings[encoding] if encoding else content)
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response['Content-Encoding'] = encoding
+        # As in GZipMiddleware, the encoded body is only semantically equivalent.
+        if response.has_header('ETag') and not response['ETag'].startswith('W/'):
+            response['ETag'] = 'W/' + response['ETag']
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def _accepted_encodings(request):
+    """Gets the encodings a request accepts that pages are stored in, best first."""
+    accepted = set()
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        try:
+            # A quality of zero refuses the encoding.
+            refused = any(
+                key.strip().lower() == 'q' and float(value) == 0
+                for key, _, value in (param.partition('=') for param in params)
+            )
+        except ValueError:
+            refused = True
+        if not refused:
+            accepted.add(name.lower())
+    return [encoding for encoding in ('br', 'gzip') if encoding in accepted]
+
+
+def compress(content):
+    """Gets the encodings to store a page's content in, by name, smaller ones only."""
+    if len(content) < MIN_COMPRESSED_LENGTH:
+        return {}
+    encodings = {'gzip': gzip.compress(content, mtime=0)}
+    if brotli is not None:
+        encodings['br'] = brotli.compress(content)
+    return {name: encoded for name, encoded in encodings.items() if len(encoded) < len(content)}
+
+
+def set_page(key, response):
+    """Caches a successful response once it's rendered; other responses are ignored.
+
+    Streaming responses are cached once their content has been streamed in full. The
+    response itself is sent uncompressed, but varies on Accept-Encoding like its hits.
+
+    """
+    if response.status_code != 200 or response.cookies:
+        return response
+    patch_vary_headers(response, ['Accept-Encoding'])
+
+    def _store(rendered, content):
+        headers = {
+            header: rendered[header] for header in CACHED_HEADERS if rendered.has_header(header)
+        }
+        cache.set(key, (content, headers, compress(content)), PAGE_TIMEOUT)
+
+    def _tee(chunks):
+        content = []
+        for chunk in chunks:
+            content.append(chunk)
+            yield chunk
+        _store(response, b''.join(content))
+
+    if response.streaming:
+        response.streaming_content = _tee(response.streaming_content)
+    elif hasattr(response, 'add_post_render_callback'):
+        response.add_post_render_callback(lambda rendered: _store(rendered, rendered.content))
+    else:
+        _store(response, response.content)
+    return response
@@ -0,0 +1,121 @@
+"""Seek-based ("keyset") pagination for published post listings.
+
+Pages are addressed by cursors encoding the (published_at, id) key of the post at
+the edge of the previous page rather than by page number. Fetching a page is then
+a bounded range scan over that key no matter how deep into the archive it lies,
+and no COUNT(*) of the full listing is ever needed.
+
+"""
+import datetime
+from collections.abc import Sequence
+from django.db.models import Q
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or cursors are combined inappropriately."""
+
+
+def encode_cursor(post):
+    """Encodes the (published_at, id) key of a post as an opaque, URL-safe string."""
+    micros = (post.published_at - EPOCH) // datetime.timedelta(microseconds=1)
+    return f'{micros}_{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor created by encode_cursor() into a (published_at, id) tuple."""
+    try:
+        micros, pk = (int(part) for part in cursor.split('_'))
+        return EPOCH + datetime.timedelta(microseconds=micros), pk
+    except (AttributeError, OverflowError, ValueError) as exc:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from exc
+
+
+class KeysetPage(Sequence):
+    """A single page of posts along with cursors to the adjacent pages.
+
+    "Next" and "previous" follow the reading order of the listing, so the next page
+    holds older posts and the previous page holds newer ones. The method names mirror
+    django.core.paginator.Page so generic templates and views keep working.
+
+    """
+    def __init__(self, object_list, paginator, *, has_older, has_newer):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_older = has_older
+        self.has_newer = has_newer
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} posts>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_older
+
+    def has_previous(self):
+        return self.has_newer
+
+    def has_other_pages(self):
+        return self.has_older or self.has_newer
+
+    @property
+    def older_cursor(self):
+        """The cursor of the page following this one, or None if there is none."""
+        return encode_cursor(self.object_list[-1]) if self.has_older else None
+
+    @property
+    def newer_cursor(self):
+        """The cursor of the page preceding this one, or None if there is none."""
+        return encode_cursor(self.object_list[0]) if self.has_newer else None
+
+
+class KeysetPaginator:
+    """Paginates a queryset of posts in descending (published_at, id) order.
+
+    Each page is fetched with a single query for per_page + 1 rows; the extra row
+    only serves to reveal whether another page exists in the direction of travel.
+
+    """
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, *, before=None, after=None):
+        """Returns the page of posts older than the cursor `before` or newer than `after`.
+
+        With neither cursor, the first (newest) page is returned. Passing both raises
+        InvalidCursor, as does passing a cursor that cannot be decoded.
+
+        """
+        if before is not None and after is not None:
+            raise InvalidCursor('Only one of before and after may be given.')
+
+        qs = self.object_list
+        if after is None:
+            if before is not None:
+                published_at, pk = decode_cursor(before)
+                qs = qs.filter(
+                    Q(published_at__lt=published_at) | Q(published_at=published_at, pk__lt=pk)
+                )
+            rows = list(qs.order_by('-published_at', '-pk')[:self.per_page + 1])
+            has_older = len(rows) > self.per_page
+            has_newer = before is not None
+            rows = rows[:self.per_page]
+        else:
+            published_at, pk = decode_cursor(after)
+            qs = qs.filter(
+                Q(published_at__gt=published_at) | Q(published_at=published_at, pk__gt=pk)
+            )
+            rows = list(qs.order_by('published_at', 'pk')[:self.per_page + 1])
+            has_older = True
+            has_newer = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        return KeysetPage(rows, self, has_older=has_older, has_newer=has_newer)
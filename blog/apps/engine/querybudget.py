@@ -0,0 +1,86 @@
+"""Per-view budgets of SQL queries, checked by tests and reported by optional middleware.
+
+A view declares its budget as a `query_budget` class attribute: the most queries
+a request to it may make with an empty cache, however many posts there are.
+Exceeding it almost always means a relation is being fetched once per object
+rather than prefetched.
+
+To log requests over budget in production, add to MIDDLEWARE:
+
+    'blog.apps.engine.querybudget.QueryBudgetMiddleware'
+
+Counting hooks into each connection's execute wrappers, so it works whether or
+not DEBUG is on and costs next to nothing.
+
+"""
+from contextlib import ExitStack, contextmanager
+import logging
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_query_budget(resolver_match):
+    """Gets the query budget of the view a request resolved to, or None if it has none."""
+    if resolver_match is None:
+        return None
+    view_class = getattr(resolver_match.func, 'view_class', None)
+    return getattr(view_class, 'query_budget', None)
+
+
+class QueryCounter:
+    """Counts the queries run on every database connection while counting()."""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def counting(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class QueryBudgetMiddleware:
+    """Logs a warning for each request making more queries than its view's budget.
+
+    Streaming responses are checked once their content has been streamed in full.
+
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with counter.counting():
+            response = self.get_response(request)
+
+        budget = get_query_budget(getattr(request, 'resolver_match', None))
+        if budget is None:
+            return response
+        if response.streaming:
+            response.streaming_content = self._check_streamed(
+                request, response.streaming_content, counter, budget
+            )
+        else:
+            self._check(request, counter, budget)
+        return response
+
+    def _check_streamed(self, request, chunks, counter, budget):
+        with counter.counting():
+            yield from chunks
+        self._check(request, counter, budget)
+
+    def _check(self, request, counter, budget):
+        if counter.count > budget:
+            logger.warning(
+                'Query budget exceeded: %s %s made %d queries, over the budget of %d for %s.',
+                request.method, request.path, counter.count, budget,
+                request.resolver_match.view_name,
+                extra={'request': request},
+            )
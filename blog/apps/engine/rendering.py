@@ -0,0 +1,28 @@
+"""Renders post content from its stored source text to HTML.
+
+Rendered HTML is stored alongside each post so pages never render bodies on the
+request path, as is an excerpt of it for the pages listing posts. Any change to
+render_content(), render_excerpt() or EXCERPT_WORDS that alters their output
+must bump RENDERER_VERSION, after which the rerender_posts management command
+brings the stored HTML and excerpts of existing posts up to date.
+
+"""
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+RENDERER_VERSION = 1
+
+# Words shown in the excerpt of a post; changing it needs a RENDERER_VERSION bump.
+EXCERPT_WORDS = 50
+
+
+def render_content(content):
+    """Renders the source text of a post to HTML."""
+    return linebreaks(content, autoescape=True)
+
+
+def render_excerpt(content_html):
+    """Gets the excerpt of a post's rendered HTML, and whether it leaves any of it out."""
+    excerpt_html = Truncator(content_html).words(EXCERPT_WORDS, html=True)
+    return excerpt_html, excerpt_html != content_html
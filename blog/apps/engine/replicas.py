@@ -0,0 +1,187 @@
+"""Routes reads to read replicas, except where they could show stale data.
+
+With the aliases of replica databases listed in DATABASE_REPLICAS, each read
+query goes to one of them at random and every write to the primary, `default`.
+Reads go to the primary instead:
+
+    - inside a transaction on the primary, which may hold uncommitted writes
+    - for REPLICA_PIN_SECONDS after a request writes, on requests from the same
+      browser, so editors see their own changes at once; a cookie marks them
+    - on admin requests
+    - for REPLICA_PIN_SECONDS after any change to published posts, on every
+      request, so pages and the sidebar, which are cached until the next
+      change, aren't rebuilt from a replica yet to catch up
+
+The last three need ReplicaPinningMiddleware, which removes itself at startup
+when there are no replicas. Without replicas, the router leaves every query to
+Django's defaults.
+
+The pin after a change to published posts is kept in the default cache, so every
+worker sees it only if that cache is shared between them, as with Memcached or
+Redis. The check engine.W001 warns of replicas used with a process-local cache.
+
+To try replicas locally with two SQLite files, add to local_settings.py:
+
+    DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3'}
+    DATABASE_REPLICAS = ['replica']
+
+and copy the primary's file over replica.sqlite3 whenever it should catch up.
+
+"""
+import asyncio
+from contextvars import ContextVar
+import random
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Warning, register
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, reverse
+from .signals import published_posts_changed, published_set_changed
+
+
+PIN_COOKIE_NAME = 'primary_pin'
+PIN_ALL_CACHE_KEY = 'engine:replicas:pin_all'
+
+# Cache backends holding their data in each process, which other workers can't see.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_current_request = ContextVar('replica_request_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas:
+            return None
+        state = _current_request.get()
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or (state is not None and state.pinned):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _current_request.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS if get_replicas() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if len(databases) > 1 and {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Pins requests to the primary database where a replica could be behind; see above."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        self.async_mode = asyncio.iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Marks the instance as a coroutine function, as MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState(pinned=self.is_pinned(request))
+        token = _current_request.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        # The cache may be across the network, so it's read off the event loop.
+        state = _RequestState(pinned=await sync_to_async(self.is_pinned, thread_sensitive=False)(request))
+        token = _current_request.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(state, response)
+
+    def is_pinned(self, request):
+        return (
+            PIN_COOKIE_NAME in request.COOKIES
+            or _is_admin_path(request.path_info)
+            or cache.get(PIN_ALL_CACHE_KEY) is not None
+        )
+
+    def finish(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax'
+            )
+        if response.streaming:
+            response.streaming_content = _streamed_with_state(response.streaming_content, state)
+        return response
+
+
+def _streamed_with_state(chunks, state):
+    # Streamed content is produced after the middleware returns, so each chunk is
+    # produced with the request's state in place again.
+    chunks = iter(chunks)
+    while True:
+        token = _current_request.set(state)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _current_request.reset(token)
+        yield chunk
+
+
+def _is_admin_path(path):
+    try:
+        return path.startswith(reverse('admin:index'))
+    except NoReverseMatch:
+        return False
+
+
+@receiver(published_posts_changed)
+@receiver(published_set_changed)
+def pin_all_requests(**kwargs):
+    if get_replicas():
+        cache.set(PIN_ALL_CACHE_KEY, True, getattr(settings, 'REPLICA_PIN_SECONDS', 10))
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if get_replicas() and backend in LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            'Read replicas are used with a default cache local to each process.',
+            hint=(
+                'Workers other than the one saving a change to published posts keep '
+                'reading replicas, and cache pages built from them. Use a cache '
+                'shared between workers, such as Memcached or Redis.'
+            ),
+            id='engine.W001',
+        )]
+    return []
@@ -0,0 +1,138 @@
+"""Full-text search over post titles and content.
+
+On SQLite, posts are indexed in an FTS5 table kept current by the receivers below
+as posts are saved and deleted. On PostgreSQL, a GIN index over the same text as a
+tsvector is maintained by the database itself. Other databases fall back to
+unindexed substring matching.
+
+Queries are treated as plain text: every term must match, and no backend's query
+syntax is exposed to users. Control characters, which no backend accepts in a
+query and no post is searched for, separate terms like spaces.
+
+"""
+import re
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+FTS_TABLE = 'engine_post_fts'
+PG_VECTOR_SQL = "to_tsvector('english', {table}.title || ' ' || {table}.content)"
+# The same text with titles weighted A and content D, for ranking the matches found
+# through the index over PG_VECTOR_SQL.
+PG_WEIGHTED_VECTOR_SQL = (
+    "setweight(to_tsvector('english', {table}.title), 'A')"
+    " || setweight(to_tsvector('english', {table}.content), 'D')"
+)
+
+# Relative weights of matches in titles and in content when ranking results.
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+# The same for ts_rank(), which takes weights of at most 1 for D, C, B and A, in that order.
+PG_RANK_WEIGHTS = [CONTENT_WEIGHT / TITLE_WEIGHT, 0.0, 0.0, 1.0]
+
+CONTROL_CHARACTERS = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+
+def query_terms(query):
+    """Splits a search query into its terms."""
+    return CONTROL_CHARACTERS.sub(' ', query).split()
+
+
+def fts5_query(query):
+    """Quotes each term of a query so FTS5 matches it literally rather than as syntax."""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in query_terms(query))
+
+
+def filter_matching(queryset, query):
+    """Filters a queryset of posts to those matching a search query, in no particular order."""
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'sqlite':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts5_query(query)]
+        ))
+    if vendor == 'postgresql':
+        vector = PG_VECTOR_SQL.format(table=table)
+        return queryset.extra(
+            where=[f"{vector} @@ plainto_tsquery('english', %s)"], params=[' '.join(terms)]
+        )
+
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    return queryset
+
+
+def rank_matching(queryset, query):
+    """Filters a queryset of posts to those matching a search query, best matches first.
+
+    Each post is annotated with its relevance as `rank`, where higher is better.
+
+    """
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'sqlite':
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[fts5_query(query)],
+            # bm25() scores better matches lower.
+            select={'rank': f'-bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CONTENT_WEIGHT})'},
+        ).order_by('-rank', '-published_at')
+    if vendor == 'postgresql':
+        vector = PG_WEIGHTED_VECTOR_SQL.format(table=table)
+        return filter_matching(queryset, query).extra(
+            select={'rank': f"ts_rank(%s::real[], {vector}, plainto_tsquery('english', %s))"},
+            select_params=[PG_RANK_WEIGHTS, ' '.join(terms)],
+        ).order_by('-rank', '-published_at')
+    return filter_matching(queryset, query).extra(select={'rank': '0'})
+
+
+#-- SQLite index maintenance --#
+
+def index_posts(posts, using):
+    """Adds posts to, or replaces them in, the SQLite full-text index."""
+    rows = [(post.pk, post.title, post.content) for post in posts]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)', rows
+        )
+
+
+def rebuild_index(using):
+    """Rebuilds the SQLite full-text index from scratch."""
+    from .models import Post
+    table = Post._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM {table}'
+        )
+
+
+@receiver(post_save, sender='engine.Post')
+def index_saved_post(sender, instance, using, update_fields=None, **kwargs):
+    if connections[using].vendor != 'sqlite':
+        return
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    index_posts([instance], using)
+
+
+@receiver(post_delete, sender='engine.Post')
+def unindex_deleted_post(sender, instance, using, **kwargs):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [instance.pk])
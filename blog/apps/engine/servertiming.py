@@ -0,0 +1,202 @@
+"""Breaks each request's latency down into a Server-Timing header.
+
+With SERVER_TIMING on, ServerTimingMiddleware reports these metrics:
+
+    db              time in SQL queries, and their number
+    ctx             time in template context processors
+    archive-links   time building the sidebar's archive links (part of ctx)
+    tpl             time rendering template responses (including ctx)
+    render-posts    time in the render_posts template tag (part of tpl)
+    view            time in the view itself, before any template is rendered
+    total           time in the middleware and everything below it
+
+With SERVER_TIMING_LOG also on, each breakdown is logged as well. The content of
+streaming responses is produced after the header is sent, so it isn't counted.
+
+The middleware runs natively under ASGI too. Async views render their templates
+themselves, so their tpl time is counted as part of view.
+
+With SERVER_TIMING off, the middleware removes itself at startup and timed()
+blocks reduce to a context variable lookup.
+
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import logging
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+
+logger = logging.getLogger(__name__)
+
+_current_timings = ContextVar('server_timings', default=None)
+
+
+class Timings:
+    """Total durations, in milliseconds, and counts of the named steps of a request."""
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0) + seconds * 1000
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def header(self):
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = f'{name};dur={duration:.1f}'
+            if name == 'db':
+                metric += f';desc="{self.counts[name]} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed(name):
+    """Adds the time spent in the block to the named step of the current request, if timed."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.log = getattr(settings, 'SERVER_TIMING_LOG', False)
+        self.async_mode = asyncio.iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Marks the instance as a coroutine function, as MiddlewareMixin does,
+            # and keeps the handler from running the hooks below in a thread.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+        _time_queries()
+        _time_context_processors()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    def start(self, request):
+        timings = Timings()
+        request._server_timing_view_started = None
+        return timings, _current_timings.set(timings), time.perf_counter()
+
+    def finish(self, request, response, timings, start):
+        if request._server_timing_view_started is not None:
+            timings.add('view', time.perf_counter() - request._server_timing_view_started)
+        timings.add('total', time.perf_counter() - start)
+
+        response['Server-Timing'] = timings.header()
+        if self.log:
+            logger.info(
+                '%s %s %s %s', request.method, request.path, response.status_code, timings.header(),
+                extra={'server_timing': timings.durations, 'query_count': timings.counts.get('db', 0)},
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._server_timing_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = _current_timings.get()
+        now = time.perf_counter()
+        if request._server_timing_view_started is not None:
+            timings.add('view', now - request._server_timing_view_started)
+            request._server_timing_view_started = None
+        # Template responses are rendered right after this hook and then call back.
+        response.add_post_render_callback(lambda rendered: timings.add('tpl', time.perf_counter() - now))
+        return response
+
+    async def _aprocess_view(self, request, *args):
+        return ServerTimingMiddleware.process_view(self, request, *args)
+
+    async def _aprocess_template_response(self, request, response):
+        return ServerTimingMiddleware.process_template_response(self, request, response)
+
+
+def _time_queries():
+    """Adds _timed_query() to every database connection, open or yet to be opened.
+
+    Connections belong to threads, and the queries of a request served under ASGI
+    run in threads of their own, so the wrapper is installed once for good rather
+    than around each request.
+
+    """
+    for connection in connections.all():
+        _add_query_timer(connection)
+    connection_created.connect(_add_query_timer_on_connect, dispatch_uid='engine.servertiming')
+
+
+def _add_query_timer_on_connect(sender, connection, **kwargs):
+    _add_query_timer(connection)
+
+
+def _add_query_timer(connection):
+    if _timed_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_query)
+
+
+def _timed_query(execute, sql, params, many, context):
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - start)
+
+
+def _time_context_processors():
+    """Wraps the context processors of every Django template engine in timed('ctx') blocks."""
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        processors = engine.engine.template_context_processors
+        if any(getattr(processor, '_server_timed', False) for processor in processors):
+            continue
+        # Engine.template_context_processors is a cached property, so this replaces it.
+        engine.engine.template_context_processors = tuple(map(_timed_processor, processors))
+
+
+def _timed_processor(processor):
+    @wraps(processor)
+    def timed_processor(request):
+        with timed('ctx'):
+            return processor(request)
+    timed_processor._server_timed = True
+    return timed_processor
@@ -0,0 +1,121 @@
+"""Signals announcing changes to published posts, and the receivers that detect them.
+
+Two levels of change are announced. published_posts_changed covers anything that
+alters how a published post appears, including edits to its title or content.
+published_set_changed covers the narrower case of changes to the published set
+itself: which posts are published, when they were published and how they are
+categorized. Editing drafts announces nothing at all.
+
+"""
+from collections import namedtuple
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from .models import Category, Post
+
+
+PublishedState = namedtuple('PublishedState', ['published_at', 'slug', 'category_slugs'])
+PublishedState.__doc__ = """Where a published post appears: its publication time, slug and categories."""
+
+
+published_posts_changed = Signal()
+"""Sent once the transaction changing one or more published posts commits.
+
+The `states` argument lists a PublishedState for each affected post as it was
+before the change and as it is after it, omitting those in which it was not or
+is not published. Anything that displays any of those states is stale.
+
+"""
+
+published_set_changed = Signal()
+"""Sent once the transaction making a change to the published set commits."""
+
+
+def notify_published_posts_changed(states):
+    """Sends published_posts_changed when the current transaction, if any, commits.
+
+    Waiting for the commit keeps readers from rebuilding derived data from rows
+    that are about to change.
+
+    """
+    states = list(states)
+    if states:
+        transaction.on_commit(lambda: published_posts_changed.send(sender=Post, states=states))
+
+
+def notify_published_set_changed():
+    """Sends published_set_changed when the current transaction, if any, commits."""
+    transaction.on_commit(lambda: published_set_changed.send(sender=Post))
+
+
+def _category_slugs(post):
+    return frozenset(post.categories.values_list('slug', flat=True))
+
+
+def _published_states(post, category_slugs):
+    """Gets the states of a post before and after a pending save, as far as either was published."""
+    loaded = post._loaded_values
+    if post.was_published:
+        yield PublishedState(loaded.get('published_at'), loaded.get('slug'), category_slugs)
+    if post.is_published:
+        yield PublishedState(post.published_at, post.slug, category_slugs)
+
+
+#-- Receivers detecting changes --#
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if raw or not (instance.is_published or instance.was_published):
+        return
+    notify_published_posts_changed(_published_states(instance, _category_slugs(instance)))
+    if instance.published_state_changed:
+        notify_published_set_changed()
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # Categories are gone by post_delete, so the post's footprint is taken here.
+    if instance.was_published:
+        notify_published_posts_changed([
+            PublishedState(instance.published_at, instance.slug, _category_slugs(instance))
+        ])
+        notify_published_set_changed()
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def post_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Additions and removals are handled once made, so the categories they touch
+    # are included in the states; clearing is handled beforehand for the same reason.
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a Category and pk_set holds post ids (None when clearing).
+        posts = instance.posts.all() if pk_set is None else Post.objects.filter(pk__in=pk_set)
+        states = [
+            PublishedState(published_at, slug, frozenset([instance.slug]))
+            for published_at, slug in posts.published().values_list('published_at', 'slug')
+        ]
+    elif instance.is_published:
+        changed = Category.objects.filter(pk__in=pk_set) if pk_set else Category.objects.none()
+        category_slugs = _category_slugs(instance).union(changed.values_list('slug', flat=True))
+        states = [PublishedState(instance.published_at, instance.slug, category_slugs)]
+    else:
+        return
+
+    if states:
+        notify_published_posts_changed(states)
+        notify_published_set_changed()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if Category.objects.has_published_posts().filter(pk=instance.pk).exists():
+        notify_published_set_changed()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    notify_published_set_changed()
@@ -0,0 +1,123 @@
+"""XML sitemaps of every public page, streamed from (path, lastmod) rows.
+
+Permalinks are read as bare (path, updated_at) rows through a queryset iterator,
+which uses a server-side cursor where the database supports one, so memory use
+doesn't grow with the number of posts. Archive pages -- the home page, years,
+months and categories -- take the latest updated_at of the posts they show.
+
+While every page fits in one sitemap, /sitemap.xml lists them all. Past the
+protocol limit it becomes a sitemap index of an archive sitemap and of post
+sitemaps sharded by id range, each of which holds at most SITEMAP_LIMIT posts.
+
+"""
+from xml.sax.saxutils import escape
+from django.db.models import DateField, ExpressionWrapper, F, IntegerField, Max, Q
+from django.db.models.functions import TruncMonth
+from django.urls import get_script_prefix, reverse
+from .models import Category, CategorySummary, MonthSummary, Post
+
+
+SITEMAP_LIMIT = 50000
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# Rows fetched per round trip, and written per chunk of output.
+CHUNK_SIZE = 2000
+
+
+#-- Rows --#
+
+def archive_rows():
+    """Yields a (path, lastmod) row for the home page and each year, month and category archive."""
+    months = list(
+        Post.objects.published()
+        .annotate(month=TruncMonth('published_at', output_field=DateField()))
+        .order_by('-month').values('month').annotate(lastmod=Max('updated_at'))
+        .values_list('month', 'lastmod')
+    )
+    if not months:
+        return
+    yield reverse('home'), max(lastmod for _, lastmod in months)
+
+    years = {}
+    for month, lastmod in months:
+        years[month.year] = max(lastmod, years.get(month.year, lastmod))
+    for year, lastmod in years.items():
+        yield reverse('year_archive', kwargs={'year': f'{year:04d}'}), lastmod
+    for month, lastmod in months:
+        yield reverse('month_archive', kwargs={
+            'year': month.strftime('%Y'),
+            'month': month.strftime('%m'),
+        }), lastmod
+
+    categories = Category.objects.annotate(
+        lastmod=Max('posts__updated_at', filter=Q(posts__status=Post.Status.PUBLISHED))
+    ).filter(lastmod__isnull=False).order_by('slug')
+    for slug, lastmod in categories.values_list('slug', 'lastmod'):
+        yield reverse('category_archive', kwargs={'slug': slug}), lastmod
+
+
+def post_rows(shard=None):
+    """Yields a (path, lastmod) row for each published post with a path, or those of one shard."""
+    posts = Post.objects.published().filter(path__isnull=False).order_by('pk')
+    if shard is not None:
+        posts = posts.filter(pk__gt=shard * SITEMAP_LIMIT, pk__lte=(shard + 1) * SITEMAP_LIMIT)
+    # Stored paths leave out the script prefix, which reversed archive paths include.
+    prefix = get_script_prefix()
+    for path, lastmod in posts.values_list('path', 'updated_at').iterator(chunk_size=CHUNK_SIZE):
+        yield prefix + path[1:], lastmod
+
+
+def post_shards():
+    """Gets the numbers of the post shards holding any published post, in order."""
+    shard = ExpressionWrapper((F('id') - 1) / SITEMAP_LIMIT, output_field=IntegerField())
+    return list(
+        Post.objects.published().annotate(shard=shard)
+        .order_by('shard').values_list('shard', flat=True).distinct()
+    )
+
+
+def needs_index():
+    """Gets whether the site has more pages than fit in one sitemap."""
+    # Summaries count archive pages without touching posts.
+    months = MonthSummary.objects.filter(post_count__gt=0).values_list('month', flat=True)
+    archive_count = (
+        1 + len(months) + len({month.year for month in months})
+        + CategorySummary.objects.filter(post_count__gt=0).count()
+    )
+    return archive_count + Post.objects.published().count() > SITEMAP_LIMIT
+
+
+#-- XML --#
+
+def stream_urlset(base_url, rows):
+    """Yields a sitemap of the given (path, lastmod) rows in chunks, for URLs relative to base_url."""
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'
+    yield from _chunked(
+        f'<url><loc>{escape(base_url + path[1:])}</loc><lastmod>{_format(lastmod)}</lastmod></url>\n'
+        for path, lastmod in rows
+    )
+    yield '</urlset>\n'
+
+
+def stream_index(base_url, paths):
+    """Yields a sitemap index of the sitemaps at the given paths, relative to base_url."""
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+    yield from _chunked(
+        f'<sitemap><loc>{escape(base_url + path[1:])}</loc></sitemap>\n' for path in paths
+    )
+    yield '</sitemapindex>\n'
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _format(lastmod):
+    return lastmod.isoformat(timespec='seconds')
@@ -0,0 +1,114 @@
+"""Incremental maintenance of the MonthSummary and CategorySummary tables.
+
+The receivers below run synchronously inside the transaction of the change they
+react to, adjusting published post counts by the difference between a post's
+contribution before and after the change. The contribution before it is read
+from the post's loaded values, which Post keeps current as it is saved or
+reloaded. rebuild() recomputes the tables from scratch, should they ever be
+suspected of drifting.
+
+"""
+from collections import Counter
+from django.db.models import Count, DateField, F, Q
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Category, CategorySummary, MonthSummary, Post
+
+
+def month_of(published_at):
+    """Gets the summary month, in the current time zone, of a publication time."""
+    return timezone.localtime(published_at).date().replace(day=1)
+
+
+def apply_deltas(month_deltas=(), category_deltas=()):
+    """Adds the given changes to the published post counts of months and category ids."""
+    _apply(MonthSummary, 'month', month_deltas)
+    _apply(CategorySummary, 'category_id', category_deltas)
+
+
+def _apply(model, key_field, deltas):
+    for key, delta in dict(deltas).items():
+        if not delta:
+            continue
+        rows = model.objects.filter(**{key_field: key})
+        if not rows.update(post_count=F('post_count') + delta):
+            model.objects.get_or_create(**{key_field: key})
+            rows.update(post_count=F('post_count') + delta)
+
+
+def rebuild():
+    """Recomputes both summary tables from the posts themselves."""
+    MonthSummary.objects.all().delete()
+    CategorySummary.objects.all().delete()
+
+    months = (
+        Post.objects.published()
+        .annotate(month=TruncMonth('published_at', output_field=DateField()))
+        .order_by().values('month').annotate(post_count=Count('id'))
+    )
+    MonthSummary.objects.bulk_create(MonthSummary(**row) for row in months)
+
+    categories = Category.objects.annotate(
+        published_count=Count('posts', filter=Q(posts__status=Post.Status.PUBLISHED))
+    ).filter(published_count__gt=0).values_list('pk', 'published_count')
+    CategorySummary.objects.bulk_create(
+        CategorySummary(category_id=pk, post_count=count) for pk, count in categories
+    )
+
+
+#-- Receivers --#
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if raw or not instance.published_state_changed:
+        return
+
+    months = Counter()
+    if instance.was_published:
+        months[month_of(instance._loaded_values['published_at'])] -= 1
+    if instance.is_published:
+        months[month_of(instance.published_at)] += 1
+
+    category_delta = int(instance.is_published) - int(instance.was_published)
+    category_ids = instance.categories.values_list('pk', flat=True) if category_delta else ()
+    apply_deltas(months, {pk: category_delta for pk in category_ids})
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    if not instance.was_published:
+        return
+    category_ids = instance.categories.values_list('pk', flat=True)
+    apply_deltas(
+        {month_of(instance._loaded_values['published_at']): -1},
+        {pk: -1 for pk in category_ids},
+    )
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def post_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Additions are counted once made, when pk_set holds exactly the new links.
+    # Removals are counted beforehand, while it can still be told which of the
+    # objects being unlinked were actually linked.
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    adding = action == 'post_add'
+    sign = 1 if adding else -1
+
+    if reverse:
+        # instance is a Category and pk_set holds post ids (None when clearing).
+        posts = Post.objects.all() if adding else instance.posts.all()
+        if pk_set is not None:
+            posts = posts.filter(pk__in=pk_set)
+        apply_deltas(category_deltas={instance.pk: sign * posts.published().count()})
+    elif instance.is_published:
+        if adding:
+            category_ids = pk_set
+        else:
+            linked = instance.categories.all()
+            if pk_set is not None:
+                linked = linked.filter(pk__in=pk_set)
+            category_ids = linked.values_list('pk', flat=True)
+        apply_deltas(category_deltas={pk: sign for pk in category_ids})
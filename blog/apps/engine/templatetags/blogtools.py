@@ -1,17 +1,81 @@
+import hashlib
 from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.urls import get_script_prefix
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
 from ..models import Post
+from ..pagination import KeysetPage
+from ..servertiming import timed
 
 
 register = template.Library()
 
+FRAGMENT_KEY_PREFIX = 'engine:post:'
 
-@register.inclusion_tag('_post.html')
-def render_posts(posts, header_tag='h2', list_categories=True, include_permalink=True):
-    if isinstance(posts, Post):
-        posts = [posts]
-    return {
-        'posts': posts,
-        'header_tag': header_tag,
-        'list_categories': list_categories,
-        'include_permalink': include_permalink,
-    }
+# Bump whenever a change to _post.html alters its output, orphaning every cached fragment.
+FRAGMENT_VERSION = 2
+
+# Fragments are keyed on everything they show, so they're never stale; this only
+# lets orphaned ones age out.
+FRAGMENT_TIMEOUT = 30 * 24 * 60 * 60
+
+
+@register.simple_tag
+def render_posts(posts, header_tag='h2', list_categories=True, include_permalink=True, excerpt=False):
+    """Renders each post through _post.html, reusing its cached fragment where there is one.
+
+    With excerpt, only each post's stored excerpt is shown, which is all that list
+    pages load. Fragments are looked up for every post at once and shared by all the
+    pages that show a post with the same options.
+
+    """
+    # Rendered here rather than as an inclusion tag so the rendering itself is timed.
+    with timed('render-posts'):
+        if isinstance(posts, Post):
+            posts = [posts]
+        elif isinstance(posts, KeysetPage):
+            posts = posts.object_list
+        options = {
+            'header_tag': header_tag,
+            'list_categories': list_categories,
+            'include_permalink': include_permalink,
+            'excerpt': excerpt,
+        }
+        keys = [_fragment_key(post, options) for post in posts]
+        fragments = cache.get_many(keys)
+
+        missing = {}
+        for key, post in zip(keys, posts):
+            if key not in fragments:
+                missing[key] = get_template('_post.html').render({'post': post, **options})
+        if missing:
+            cache.set_many(missing, FRAGMENT_TIMEOUT)
+            fragments.update(missing)
+        return mark_safe(''.join(fragments[key] for key in keys))
+
+
+def _fragment_key(post, options):
+    # Category edits and links don't touch updated_at, so listed categories are keyed on too.
+    categories = (
+        [(category.pk, category.name, category.slug) for category in post.categories.all()]
+        if options['list_categories'] else None
+    )
+    state = repr([
+        FRAGMENT_VERSION,
+        post.updated_at,
+        post.content_html_version,
+        categories,
+        sorted(options.items()),
+        # Dates are shown in the current time zone and language, and links under the script prefix.
+        timezone.get_current_timezone_name(),
+        translation.get_language(),
+        get_script_prefix(),
+    ])
+    return f'{FRAGMENT_KEY_PREFIX}{post.pk}:{hashlib.md5(state.encode()).hexdigest()}'
+
+
+@register.inclusion_tag('_pagination.html')
+def render_pagination(page):
+    return {'page': page}
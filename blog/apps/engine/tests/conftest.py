@@ -1,5 +1,6 @@
 import datetime
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from model_bakery import baker
 import pytest
@@ -7,6 +8,14 @@ from .utils import ONE_DAY_AGO
 from ..models import Post
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keeps cached data from leaking between tests, whose database changes are rolled back."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def author():
     return baker.make(User)
@@ -30,3 +39,9 @@ def post_factory(author):
             kwargs['status'] = Post.Status.HIDDEN
             return self.create(_save=_save, **kwargs)
     return _Factory(author)
+
+
+@pytest.fixture
+def on_commit(django_capture_on_commit_callbacks):
+    """Runs on-commit callbacks, which a test's enclosing transaction would otherwise hold."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
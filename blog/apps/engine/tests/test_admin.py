@@ -0,0 +1,32 @@
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+import pytest
+from ..models import Post
+
+
+def _run_action(admin_client, action, posts):
+    return admin_client.post('/admin/engine/post/', {
+        'action': action,
+        ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+    }, follow=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action, status', [
+    ('publish', Post.Status.PUBLISHED),
+    ('hide', Post.Status.HIDDEN),
+    ('revert_to_draft', Post.Status.DRAFT),
+])
+def test_status_actions(admin_client, post_factory, action, status):
+    posts = [post_factory.create_draft(), post_factory.create(), post_factory.create_hidden()]
+    response = _run_action(admin_client, action, posts[:2])
+    assert f'post(s) marked as {status.label.lower()}.' in response.content.decode()
+    assert [Post.objects.get(pk=post.pk).status for post in posts[:2]] == [status, status]
+    assert Post.objects.get(pk=posts[2].pk).status == Post.Status.HIDDEN
+
+
+@pytest.mark.django_db
+def test_publish_conflicting_slugs(admin_client, post_factory):
+    posts = [post_factory.create_draft(slug='same'), post_factory.create_draft(slug='same')]
+    response = _run_action(admin_client, 'publish', posts)
+    assert 'Nothing was changed' in response.content.decode()
+    assert not Post.objects.published().exists()
@@ -0,0 +1,57 @@
+import json
+import pytest
+from .. import benchmark
+from ..models import Category, MonthSummary, Post
+
+
+def _snapshot():
+    return list(Post.objects.order_by('pk').values_list(
+        'title', 'slug', 'status', 'published_at', 'content', 'categories__slug'
+    ))
+
+
+@pytest.mark.django_db
+def test_build_corpus():
+    corpus = benchmark.build_corpus(40, 5, seed=3)
+    assert corpus['posts'] == Post.objects.count() == 40
+    assert corpus['published_posts'] == Post.objects.published().count()
+    published = Post.objects.published()
+    assert all(post.path and post.content_html for post in published)
+    # Derived data is rebuilt after the bulk inserts.
+    assert sum(MonthSummary.objects.values_list('post_count', flat=True)) == published.count()
+
+
+@pytest.mark.django_db
+def test_build_corpus_is_reproducible():
+    benchmark.build_corpus(20, 3, seed=7)
+    first = _snapshot()
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    benchmark.build_corpus(20, 3, seed=7)
+    assert _snapshot() == first
+
+
+@pytest.mark.django_db
+def test_run_benchmarks():
+    results = benchmark.run_benchmarks([15, 30], category_count=3, repeat=1)
+    names = {result['name'] for result in results['results']}
+    assert {'GET /', 'GET /sitemap.xml', 'archive_links', 'render_posts'} <= names
+    assert {result['corpus']['posts'] for result in results['results']} == {15, 30}
+    assert all(result['warm']['runs'] == 1 for result in results['results'])
+    json.dumps(results)
+    # Each corpus is rolled back once timed.
+    assert not Post.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_server_benchmarks(settings):
+    settings.ALLOWED_HOSTS = ['testserver']
+    results = benchmark.run_server_benchmarks([15], category_count=3, requests=6, client_delay=0)
+    result, = results
+    assert result['corpus']['posts'] == 15
+    assert '/' in result['urls'] and '/sitemap.xml' not in result['urls']
+    assert result['wsgi']['requests_per_second'] > 0
+    assert result['asgi']['requests_per_second'] > 0
+    json.dumps(results)
+    # Each corpus is flushed once compared.
+    assert not Post.objects.exists()
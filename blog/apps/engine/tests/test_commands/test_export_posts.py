@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from io import StringIO
+import json
+from django.core.management import call_command
+from model_bakery import baker
+import pytest
+from ...models import Category
+
+
+def _export(*args):
+    stdout = StringIO()
+    call_command('export_posts', *args, stdout=stdout)
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+@pytest.mark.django_db
+def test_export(post_factory, author):
+    python, hiking = baker.make(Category, name='Python', slug='python'), baker.make(Category, slug='hiking')
+    published = post_factory.create(
+        slug='first', published_at=datetime(2021, 6, 5, 4, tzinfo=timezone.utc), categories=[python, hiking]
+    )
+    post_factory.create_draft(slug='draft')
+    records = _export('--chunk-size=1')
+
+    assert [record['type'] for record in records] == ['category', 'category', 'post', 'post']
+    assert records[0] == {'type': 'category', 'name': 'Python', 'slug': 'python'}
+    assert records[2] == {
+        'type': 'post',
+        'title': published.title,
+        'slug': 'first',
+        'author': author.username,
+        'content': published.content,
+        'status': 'published',
+        'published_at': '2021-06-05T04:00:00+00:00',
+        'publish_at': None,
+        'categories': ['hiking', 'python'],
+    }
+    assert records[3]['status'] == 'draft'
+    assert records[3]['published_at'] is None
+    assert records[3]['categories'] == []
+
+
+@pytest.mark.django_db
+def test_export_to_file(tmp_path, post_factory):
+    post_factory.create()
+    output = tmp_path / 'dump.jsonl'
+    stderr = StringIO()
+    call_command('export_posts', str(output), stderr=stderr)
+    assert json.loads(output.read_text())['type'] == 'post'
+    assert 'Wrote 1 record(s)' in stderr.getvalue()
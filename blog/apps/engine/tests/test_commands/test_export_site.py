@@ -0,0 +1,100 @@
+from io import StringIO
+import json
+from django.core.management import call_command
+from model_bakery import baker
+import pytest
+from ..utils import tz_datetime
+from ...management.commands.export_site import MANIFEST_NAME
+from ...models import Category, Post
+
+
+def _export(output_dir, *args):
+    stdout = StringIO()
+    call_command('export_site', str(output_dir), '--jobs=1', *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+@pytest.fixture
+def site(post_factory):
+    category = baker.make(Category, slug='python')
+    return {
+        'june': post_factory.create(
+            published_at=tz_datetime(2021, 6, 5), slug='june', categories=[category]
+        ),
+        'may': post_factory.create(published_at=tz_datetime(2021, 5, 5), slug='may'),
+        'draft': post_factory.create_draft(slug='draft'),
+    }
+
+
+@pytest.mark.django_db
+def test_full_export(tmp_path, site):
+    output = _export(tmp_path)
+    assert 'Rendered 7 page(s) in 7 group(s)' in output
+    for name in [
+        'index.html',
+        '2021/index.html',
+        '2021/06/index.html',
+        '2021/05/index.html',
+        'categories/python/index.html',
+        '2021/06/june/index.html',
+        '2021/05/may/index.html',
+    ]:
+        assert (tmp_path / name).is_file()
+    assert not (tmp_path / 'draft').exists()
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert set(manifest['posts']) == {str(site['june'].pk), str(site['may'].pk)}
+
+
+@pytest.mark.django_db
+def test_export_follows_pagination(tmp_path, post_factory):
+    for day in range(1, 13):
+        post_factory.create(published_at=tz_datetime(2021, 6, day), slug=f'post-{day}')
+    _export(tmp_path)
+    older = sorted(path.name for path in (tmp_path / '2021' / '06').glob('before=*.html'))
+    newer = sorted(path.name for path in (tmp_path / '2021' / '06').glob('after=*.html'))
+    assert len(older) == 1 and len(newer) == 1
+    assert 'Older posts' in (tmp_path / '2021' / '06' / 'index.html').read_text()
+
+
+@pytest.mark.django_db
+def test_rerun_without_changes_renders_nothing(tmp_path, site):
+    _export(tmp_path)
+    assert 'Rendered 0 page(s) in 0 group(s)' in _export(tmp_path)
+
+
+@pytest.mark.django_db
+def test_rerun_renders_only_changed_groups(tmp_path, site, on_commit):
+    _export(tmp_path)
+    may_page = (tmp_path / '2021' / '05' / 'index.html').stat().st_mtime_ns
+
+    with on_commit():
+        site['june'].title = 'New, improved title'
+        site['june'].save()
+
+    output = _export(tmp_path)
+    # Home, 2021, 2021/06, the category and the permalink.
+    assert 'Rendered 5 page(s) in 5 group(s)' in output
+    assert 'New, improved title' in (tmp_path / '2021' / '06' / 'june' / 'index.html').read_text()
+    assert (tmp_path / '2021' / '05' / 'index.html').stat().st_mtime_ns == may_page
+
+
+@pytest.mark.django_db
+def test_rerun_removes_unpublished_pages(tmp_path, site, on_commit):
+    _export(tmp_path)
+
+    with on_commit():
+        post = Post.objects.get(pk=site['may'].pk)
+        post.status = Post.Status.HIDDEN
+        post.save()
+
+    output = _export(tmp_path)
+    assert 'removed 2 stale file(s)' in output
+    assert not (tmp_path / '2021' / '05' / 'index.html').exists()
+    assert not (tmp_path / '2021' / '05' / 'may' / 'index.html').exists()
+    assert (tmp_path / '2021' / '06' / 'june' / 'index.html').exists()
+
+
+@pytest.mark.django_db
+def test_full_flag_renders_everything(tmp_path, site):
+    _export(tmp_path)
+    assert 'Rendered 7 page(s)' in _export(tmp_path, '--full')
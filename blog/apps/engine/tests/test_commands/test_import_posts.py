@@ -0,0 +1,135 @@
+from datetime import datetime, timezone
+from io import StringIO
+import json
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+import pytest
+from ..utils import assert_is_now, tz_datetime
+from ...context_processors import ARCHIVE_LINKS_CACHE_KEY
+from ...models import Category, CategorySummary, MonthSummary, Post
+
+
+def _dump(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def _import(tmp_path, content, *args):
+    path = tmp_path / 'dump.jsonl'
+    path.write_text(content)
+    stdout = StringIO()
+    call_command('import_posts', str(path), *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+def _post(author, slug, status='published', **fields):
+    return {
+        'type': 'post',
+        'title': slug.title(),
+        'slug': slug,
+        'author': author.username,
+        'content': f'Content of {slug}.',
+        'status': status,
+        'published_at': '2021-06-05T12:00:00+00:00',
+        'categories': [],
+        **fields,
+    }
+
+
+@pytest.mark.django_db
+def test_round_trip(tmp_path, post_factory):
+    python = baker.make(Category, name='Python', slug='python')
+    post_factory.create(slug='one', published_at=tz_datetime(2021, 6, 5), categories=[python])
+    post_factory.create(slug='two', content='Up the mountain trail.', published_at=tz_datetime(2021, 5, 5))
+    post_factory.create_hidden(slug='three', published_at=tz_datetime(2021, 4, 5))
+    post_factory.create_draft(slug='four')
+    post_factory.create_draft(slug='five', publish_at=tz_datetime(2031, 6, 5))
+    stdout = StringIO()
+    call_command('export_posts', stdout=stdout)
+    dump = stdout.getvalue()
+    fields = ('slug', 'status', 'published_at', 'publish_at', 'path', 'content_html')
+    before = list(Post.objects.order_by('pk').values_list(*fields))
+    Post.objects.all().delete()
+
+    output = _import(tmp_path, dump, '--batch-size=3')
+    assert 'Imported 1 category record(s) and 5 post(s).' in output
+    assert list(Post.objects.order_by('pk').values_list(*fields)) == before
+    assert list(Post.objects.get(slug='one').categories.all()) == [python]
+    assert Post.objects.published().search('trail').get().slug == 'two'
+    assert set(MonthSummary.objects.filter(post_count__gt=0).values_list('post_count', flat=True)) == {1}
+    assert CategorySummary.objects.get(category=python).post_count == 1
+
+
+@pytest.mark.django_db
+def test_published_at_rules(tmp_path, author):
+    _import(tmp_path, _dump(
+        _post(author, 'published-now', published_at=None),
+        _post(author, 'draft', status='draft'),
+        _post(author, 'hidden', status='hidden'),
+    ))
+    posts = {post.slug: post for post in Post.objects.all()}
+    assert_is_now(posts['published-now'].published_at)
+    assert posts['published-now'].path.endswith('/published-now/')
+    assert posts['draft'].published_at is None and posts['draft'].path is None
+    assert posts['hidden'].published_at == datetime(2021, 6, 5, 12, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_schedules(tmp_path, author):
+    publish_at = '2031-06-05T12:00:00+00:00'
+    _import(tmp_path, _dump(
+        _post(author, 'scheduled', status='draft', publish_at=publish_at),
+        _post(author, 'published', publish_at=publish_at),
+    ))
+    posts = {post.slug: post for post in Post.objects.all()}
+    assert posts['scheduled'].publish_at == datetime(2031, 6, 5, 12, tzinfo=timezone.utc)
+    assert Post.objects.scheduled().get() == posts['scheduled']
+    # Published posts are no longer scheduled, as when saved.
+    assert posts['published'].publish_at is None
+
+
+@pytest.mark.django_db
+def test_existing_categories_reused(tmp_path, author):
+    python = baker.make(Category, name='Python', slug='python')
+    _import(tmp_path, _dump(
+        {'type': 'category', 'name': 'Python', 'slug': 'python'},
+        {'type': 'category', 'name': 'Hiking', 'slug': 'hiking'},
+        _post(author, 'post', categories=['python', 'hiking']),
+    ))
+    assert Category.objects.count() == 2
+    assert python in Post.objects.get().categories.all()
+
+
+@pytest.mark.django_db
+def test_import_invalidates_sidebar(tmp_path, author, on_commit):
+    cache.set(ARCHIVE_LINKS_CACHE_KEY, ('stale', {}, None))
+    with on_commit():
+        _import(tmp_path, _dump(_post(author, 'post')))
+    assert cache.get(ARCHIVE_LINKS_CACHE_KEY) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('record, message', [
+    ('not json', 'Line 2: Not a JSON object with a type.'),
+    (json.dumps({'type': 'comment'}), "Line 2: Unknown type 'comment'."),
+    (json.dumps({'type': 'post', 'slug': 'x'}), 'Line 2: Missing field'),
+])
+def test_invalid_record(tmp_path, author, record, message):
+    content = _dump(_post(author, 'first')) + record + '\n'
+    with pytest.raises(CommandError, match=message):
+        _import(tmp_path, content, '--batch-size=1')
+    # Earlier batches stay imported.
+    assert Post.objects.get().slug == 'first'
+
+
+@pytest.mark.django_db
+def test_unknown_author(tmp_path, author):
+    with pytest.raises(CommandError, match="Unknown author 'nobody'"):
+        _import(tmp_path, _dump({**_post(author, 'post'), 'author': 'nobody'}))
+
+
+@pytest.mark.django_db
+def test_duplicate_path(tmp_path, author):
+    with pytest.raises(CommandError, match='Line 1: In the batch of posts starting here'):
+        _import(tmp_path, _dump(_post(author, 'same'), _post(author, 'same')))
+    assert not Post.objects.exists()
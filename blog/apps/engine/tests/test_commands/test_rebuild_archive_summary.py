@@ -0,0 +1,14 @@
+from datetime import date
+from django.core.management import call_command
+import pytest
+from ...models import MonthSummary
+from ..utils import tz_datetime
+
+
+@pytest.mark.django_db
+def test_rebuilds_summary(post_factory):
+    post_factory.create(published_at=tz_datetime(2021, 5, 3))
+    MonthSummary.objects.all().delete()
+
+    call_command('rebuild_archive_summary')
+    assert list(MonthSummary.objects.values_list('month', 'post_count')) == [(date(2021, 5, 1), 1)]
@@ -0,0 +1,16 @@
+from django.core.management import call_command
+from django.db import connection
+import pytest
+from ...models import Post
+from ...search import FTS_TABLE
+
+
+@pytest.mark.django_db
+def test_rebuilds_index(post_factory):
+    post = post_factory.create(title='Hiking')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    assert list(Post.objects.matching('hiking')) == []
+
+    call_command('rebuild_search_index')
+    assert list(Post.objects.matching('hiking')) == [post]
@@ -0,0 +1,30 @@
+from django.core.management import call_command
+import pytest
+from ...models import Post
+from ...rendering import RENDERER_VERSION
+
+
+@pytest.mark.django_db
+def test_rerenders_stale_posts_only(post_factory):
+    current = post_factory.create(content='Current')
+    stale = post_factory.create(content='Stale')
+    Post.objects.update(content_html='')
+    Post.objects.filter(pk=stale.pk).update(content_html_version=RENDERER_VERSION - 1)
+
+    call_command('rerender_posts')
+
+    current.refresh_from_db()
+    stale.refresh_from_db()
+    assert current.content_html == ''
+    assert stale.content_html == '<p>Stale</p>'
+
+
+@pytest.mark.django_db
+def test_rerenders_all_posts(post_factory):
+    post = post_factory.create(content='Current')
+    Post.objects.update(content_html='')
+
+    call_command('rerender_posts', '--all')
+
+    post.refresh_from_db()
+    assert post.content_html == '<p>Current</p>'
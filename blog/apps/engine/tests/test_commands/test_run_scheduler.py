@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+import pytest
+from ..utils import ONE_DAY_AGO
+from ...management.commands.run_scheduler import Command
+from ...models import Post
+
+
+@pytest.mark.django_db
+def test_once_publishes_due_posts(post_factory):
+    for _ in range(3):
+        post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    post_factory.create_draft(publish_at=timezone.now() + timedelta(days=1))
+    stdout = StringIO()
+    call_command('run_scheduler', '--once', stdout=stdout)
+    assert 'Published 3 scheduled post(s).' in stdout.getvalue()
+    assert Post.objects.published().count() == 3
+
+
+@pytest.mark.django_db
+def test_sleeps_until_next_due(post_factory):
+    command = Command()
+    assert command.get_sleep(60) == 60
+    post_factory.create_draft(publish_at=timezone.now() + timedelta(seconds=30))
+    assert 29 < command.get_sleep(60) <= 30
+    assert command.get_sleep(10) == 10
+    post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    assert command.get_sleep(60) == 0
+
+
+@pytest.mark.django_db
+def test_loop_survives_errors(post_factory, monkeypatch, caplog):
+    post = post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    sleeps = []
+    def publish_due():
+        if not sleeps:
+            raise RuntimeError('Database went away.')
+        return Post.objects.filter(pk=post.pk).set_status(Post.Status.PUBLISHED)
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(Post.objects, 'publish_due', publish_due, raising=False)
+    monkeypatch.setattr('time.sleep', sleep)
+    call_command('run_scheduler', '--max-sleep', '5', stdout=StringIO())
+    assert sleeps[0] == 5
+    assert 'Publishing scheduled posts failed.' in caplog.text
+    post.refresh_from_db()
+    assert post.is_published
+
+
+@pytest.mark.django_db
+def test_loop(post_factory, monkeypatch):
+    post = post_factory.create_draft(publish_at=timezone.now() + timedelta(seconds=30))
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+        Post.objects.filter(pk=post.pk).update(publish_at=ONE_DAY_AGO)
+    monkeypatch.setattr('time.sleep', sleep)
+    call_command('run_scheduler', stdout=StringIO())
+    assert 29 < sleeps[0] <= 30
+    post.refresh_from_db()
+    assert post.is_published
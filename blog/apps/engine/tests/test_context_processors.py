@@ -4,7 +4,7 @@ import pytest
 from model_bakery import baker
 
 from ..context_processors import archive_links
-from ..models import Category
+from ..models import Category, Post
 from .utils import tz_datetime
 
 
@@ -44,3 +44,35 @@ def test_archive_links(post_factory):
         [date(2021, 8, 1), date(2021, 5, 1), date(2020, 6, 1)]
     assert [m.url for m in ctx['all_months']] == \
         ['/2021/08/', '/2021/05/', '/2020/06/']
+
+
+@pytest.mark.django_db
+def test_archive_links_cached(post_factory, django_assert_num_queries):
+    post_factory.create(published_at=tz_datetime(2021, 5, 3), categories=[baker.make(Category)])
+    archive_links(None)
+    with django_assert_num_queries(0):
+        ctx = archive_links(None)
+    assert [m.url for m in ctx['all_months']] == ['/2021/05/']
+
+
+@pytest.mark.django_db
+def test_archive_links_rebuilt_after_publish(post_factory, on_commit):
+    post = post_factory.create_draft()
+    assert archive_links(None)['all_months'] == []
+
+    with on_commit():
+        post.status = Post.Status.PUBLISHED
+        post.save()
+    assert len(archive_links(None)['all_months']) == 1
+
+
+@pytest.mark.django_db
+def test_archive_links_rebuilt_after_recategorize(post_factory, on_commit):
+    c1 = baker.make(Category, name='Hiking')
+    c2 = baker.make(Category, name='Python')
+    post = post_factory.create(categories=[c1])
+    assert archive_links(None)['all_categories'] == [c1]
+
+    with on_commit():
+        post.categories.set([c2])
+    assert archive_links(None)['all_categories'] == [c2]
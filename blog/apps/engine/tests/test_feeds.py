@@ -0,0 +1,56 @@
+from xml.etree import ElementTree
+from ..feeds import AtomFeed, RssFeed
+from .utils import tz_datetime
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def _feed(feed_class):
+    return feed_class(
+        title='Blog', link='http://testserver/', description='Posts',
+        updated=tz_datetime(2021, 6, 5),
+    )
+
+
+def _items(count):
+    for i in range(count):
+        yield {'title': f'Post {i}', 'link': f'http://testserver/{i}/', 'description': '<p>Hi</p>'}
+
+
+def test_atom_stream_matches_feed_structure():
+    chunks = list(_feed(AtomFeed).stream(_items(3)))
+    # The root elements, one chunk per entry and the closing tags.
+    assert len(chunks) == 5
+    root = ElementTree.fromstring(''.join(chunks))
+    assert root.tag == f'{ATOM}feed'
+    assert root.find(f'{ATOM}updated').text.startswith('2021-06-05')
+    assert [e.find(f'{ATOM}title').text for e in root.iter(f'{ATOM}entry')] == \
+        ['Post 0', 'Post 1', 'Post 2']
+
+
+def test_rss_stream_matches_feed_structure():
+    root = ElementTree.fromstring(''.join(_feed(RssFeed).stream(_items(2))))
+    assert root.tag == 'rss'
+    assert [item.find('title').text for item in root.find('channel').iter('item')] == \
+        ['Post 0', 'Post 1']
+
+
+def test_stream_consumes_items_lazily():
+    consumed = []
+
+    def items():
+        for item in _items(3):
+            consumed.append(item)
+            yield item
+
+    stream = _feed(AtomFeed).stream(items())
+    next(stream)
+    assert consumed == []
+    next(stream)
+    assert len(consumed) == 1
+
+
+def test_stream_without_items():
+    root = ElementTree.fromstring(''.join(_feed(AtomFeed).stream([])))
+    assert root.find(f'{ATOM}entry') is None
@@ -0,0 +1,29 @@
+from importlib import import_module
+from django.apps import apps
+import pytest
+from .utils import tz_datetime
+from ..models import Post
+
+
+#-- 0009_post_path --#
+
+@pytest.mark.django_db
+def test_set_existing_paths_renames_shared_permalinks(post_factory):
+    set_existing_paths = import_module('blog.apps.engine.migrations.0009_post_path').set_existing_paths
+    first = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    second = post_factory.create(published_at=tz_datetime(2021, 6, 8))
+    hidden = post_factory.create_hidden(published_at=tz_datetime(2021, 6, 9))
+    # Already takes the first free suffix.
+    suffixed = post_factory.create(published_at=tz_datetime(2021, 6, 1))
+    draft = post_factory.create_draft()
+    Post.objects.update(path=None, slug='shared')
+    Post.objects.filter(pk=suffixed.pk).update(slug='shared-2')
+
+    set_existing_paths(apps, None)
+    for post in [first, second, hidden, suffixed, draft]:
+        post.refresh_from_db()
+    assert (first.slug, first.path) == ('shared', '/2021/06/shared/')
+    assert (second.slug, second.path) == ('shared-3', '/2021/06/shared-3/')
+    assert (hidden.slug, hidden.path) == ('shared-4', '/2021/06/shared-4/')
+    assert suffixed.path == '/2021/06/shared-2/'
+    assert draft.path is None
@@ -1,6 +1,9 @@
+import datetime
+from django.core.exceptions import ValidationError
 import pytest
 from ..utils import assert_is_now, tz_datetime, ONE_DAY_AGO
 from ...models import Post
+from ...rendering import RENDERER_VERSION
 
 
 #-- Field options --#
@@ -47,6 +50,17 @@ def test_get_absolute_url_published():
     assert post.get_absolute_url() == '/2020/06/foo-bar/'
 
 
+@pytest.mark.django_db
+def test_get_absolute_url_uses_local_month(post_factory):
+    # Midnight UTC on June 1st is still May 31st in the current time zone.
+    post = post_factory.create(
+        slug='foo-bar',
+        published_at=datetime.datetime(2020, 6, 1, tzinfo=datetime.timezone.utc),
+    )
+    post.refresh_from_db()
+    assert post.get_absolute_url() == '/2020/05/foo-bar/'
+
+
 #-- is_draft --#
 
 @pytest.mark.parametrize('status,expected',
@@ -75,6 +89,24 @@ def test_is_published(status, expected):
     assert post.is_published is expected
 
 
+#-- was_published --#
+
+@pytest.mark.django_db
+def test_was_published__follows_refresh(post_factory):
+    post = post_factory.create_draft()
+    Post.objects.filter(pk=post.pk).set_status(Post.Status.PUBLISHED)
+    post.refresh_from_db()
+    assert post.was_published is True
+    assert post.published_state_changed is False
+
+
+@pytest.mark.django_db
+def test_was_published__follows_deferred_load(post_factory):
+    post = Post.objects.only('title').get(pk=post_factory.create().pk)
+    assert post.is_published is True
+    assert post.was_published is True
+
+
 #-- save() --#
 
 @pytest.mark.django_db
@@ -167,4 +199,113 @@ def test_save__update__keep_hidden(post_factory):
     post = post_factory.create_hidden()
     post.title = 'New, improved title'
     post.save()
-    assert post.published_at == ONE_DAY_AGO
\ No newline at end of file
+    assert post.published_at == ONE_DAY_AGO
+
+@pytest.mark.django_db
+def test_save__renders_content(post_factory):
+    post = post_factory.create(content='First <para>\n\nSecond\nline', _save=False)
+    post.save()
+    assert post.content_html == '<p>First &lt;para&gt;</p>\n\n<p>Second<br>line</p>'
+    assert post.content_html_version == RENDERER_VERSION
+
+
+@pytest.mark.django_db
+def test_save__update_fields_content_rerenders(post_factory):
+    post = post_factory.create(content='Old')
+    post.content = 'New'
+    post.save(update_fields=['content'])
+    post.refresh_from_db()
+    assert post.content_html == '<p>New</p>'
+
+
+@pytest.mark.django_db
+def test_save__stores_excerpt(post_factory):
+    post = post_factory.create(content=' '.join(['word'] * 60))
+    assert post.excerpt_html == '<p>' + ' '.join(['word'] * 50) + '…</p>'
+    assert post.excerpt_truncated
+    post.content = 'Short'
+    post.save(update_fields=['content'])
+    post.refresh_from_db()
+    assert post.excerpt_html == '<p>Short</p>'
+    assert not post.excerpt_truncated
+
+
+@pytest.mark.django_db
+def test_save__publish_clears_schedule(post_factory):
+    post = post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    assert post.publish_at == ONE_DAY_AGO
+    post.status = Post.Status.PUBLISHED
+    post.save(update_fields=['status'])
+    post.refresh_from_db()
+    assert post.publish_at is None
+
+
+#-- path --#
+
+@pytest.mark.django_db
+def test_path__set_on_publish(post_factory):
+    post = post_factory.create_draft(slug='foo-bar')
+    assert post.path is None
+    post.status = Post.Status.PUBLISHED
+    post.save(update_fields=['status'])
+    post.refresh_from_db()
+    assert post.path == post.published_at.strftime('/%Y/%m/foo-bar/')
+
+
+@pytest.mark.django_db
+def test_path__cleared_on_unpublish(post_factory):
+    post = post_factory.create()
+    post.status = Post.Status.DRAFT
+    post.save()
+    assert post.path is None
+
+
+@pytest.mark.django_db
+def test_path__kept_while_hidden(post_factory):
+    post = post_factory.create(slug='foo-bar', published_at=tz_datetime(2020, 6, 5))
+    post.status = Post.Status.HIDDEN
+    post.save()
+    assert post.path == '/2020/06/foo-bar/'
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    assert post.path == '/2020/06/foo-bar/'
+
+
+@pytest.mark.django_db
+def test_path__follows_slug(post_factory):
+    post = post_factory.create(slug='foo-bar', published_at=tz_datetime(2020, 6, 5))
+    post.slug = 'bar-baz'
+    post.save(update_fields=['slug'])
+    post.refresh_from_db()
+    assert post.path == '/2020/06/bar-baz/'
+
+
+@pytest.mark.django_db
+def test_clean__duplicate_path(post_factory):
+    post_factory.create(slug='foo-bar', published_at=tz_datetime(2020, 6, 5))
+    post = post_factory.create_draft(slug='foo-bar', _save=False)
+    post.clean()
+
+    post.status = Post.Status.HIDDEN
+    post.published_at = tz_datetime(2020, 6, 20)
+    with pytest.raises(ValidationError):
+        post.clean()
+
+
+@pytest.mark.django_db
+def test_clean__scheduled_duplicate_path(post_factory):
+    post_factory.create(slug='foo-bar', published_at=tz_datetime(2030, 6, 5))
+    post = post_factory.create_draft(slug='foo-bar', publish_at=tz_datetime(2030, 7, 5), _save=False)
+    post.clean()
+
+    post.publish_at = tz_datetime(2030, 6, 20)
+    with pytest.raises(ValidationError) as excinfo:
+        post.clean()
+    assert 'slug' in excinfo.value.message_dict
+
+
+def test_clean__scheduled_while_published():
+    post = Post(slug='foo-bar', status=Post.Status.PUBLISHED, publish_at=ONE_DAY_AGO)
+    with pytest.raises(ValidationError) as excinfo:
+        post.clean()
+    assert 'publish_at' in excinfo.value.message_dict
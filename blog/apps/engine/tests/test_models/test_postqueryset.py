@@ -1,7 +1,12 @@
-from datetime import date
+from datetime import date, datetime, timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
 import pytest
-from ..utils import tz_datetime
-from ...models import Post, PostQuerySet
+from ..utils import ONE_DAY_AGO, assert_is_now, tz_datetime
+from ...models import Category, CategorySummary, MonthSummary, Post, PostQuerySet
+from ...rendering import RENDERER_VERSION
+from ...signals import published_posts_changed, published_set_changed
 
 
 #-- published() --#
@@ -66,3 +71,187 @@ def test_published_months(post_factory):
     assert list(qs.published_months()) == [
         date(2021, 8, 1), date(2021, 5, 1), date(2020, 6, 1)
     ]
+
+
+
+#-- stale_renders() / rerender() --#
+
+@pytest.mark.django_db
+def test_stale_renders(post_factory):
+    post_factory.create()
+    stale = post_factory.create()
+    Post.objects.filter(pk=stale.pk).update(content_html_version=RENDERER_VERSION - 1)
+
+    qs = PostQuerySet(Post)
+    assert list(qs.stale_renders()) == [stale]
+
+
+@pytest.mark.django_db
+def test_rerender(post_factory):
+    posts = [post_factory.create(content=f'Post {i}') for i in range(5)]
+    Post.objects.update(content_html='', content_html_version=0)
+
+    qs = PostQuerySet(Post)
+    assert qs.rerender(batch_size=2) == 5
+    for post in posts:
+        updated_at = post.updated_at
+        post.refresh_from_db()
+        assert post.content_html == f'<p>{post.content}</p>'
+        assert post.content_html_version == RENDERER_VERSION
+        assert post.updated_at == updated_at
+
+
+#-- Scheduling --#
+
+@pytest.mark.django_db
+def test_scheduled(post_factory):
+    draft = post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    hidden = post_factory.create_hidden(publish_at=ONE_DAY_AGO)
+    post_factory.create_draft()
+    assert set(Post.objects.scheduled()) == {draft, hidden}
+
+
+@pytest.mark.django_db
+def test_next_due(post_factory):
+    assert Post.objects.next_due() is None
+    post_factory.create_draft(publish_at=datetime(2031, 6, 5, tzinfo=timezone.utc))
+    post_factory.create_draft(publish_at=datetime(2031, 5, 5, tzinfo=timezone.utc))
+    assert Post.objects.next_due() == datetime(2031, 5, 5, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_publish_due(post_factory):
+    due = post_factory.create_draft(publish_at=ONE_DAY_AGO)
+    later = post_factory.create_draft(publish_at=datetime(2031, 5, 5, tzinfo=timezone.utc))
+    assert Post.objects.publish_due() == 1
+    due.refresh_from_db()
+    later.refresh_from_db()
+    assert due.is_published and due.publish_at is None
+    assert_is_now(due.published_at)
+    assert later.is_draft
+    assert Post.objects.publish_due(now=datetime(2031, 5, 5, tzinfo=timezone.utc)) == 1
+
+
+@pytest.mark.django_db
+def test_publish_due_skips_conflicting_paths(post_factory, caplog):
+    # Published this month, as the due posts are about to be.
+    taken = post_factory.create(slug='taken', published_at=datetime.now(timezone.utc))
+    conflicting = post_factory.create_draft(slug='taken', publish_at=ONE_DAY_AGO)
+    first = post_factory.create_draft(slug='twin', publish_at=ONE_DAY_AGO)
+    second = post_factory.create_draft(slug='twin', publish_at=ONE_DAY_AGO)
+    unrelated = post_factory.create_draft(slug='unrelated', publish_at=ONE_DAY_AGO)
+
+    assert Post.objects.publish_due() == 2
+    assert set(Post.objects.published().exclude(pk=taken.pk)) == {first, unrelated}
+    for post in [conflicting, second]:
+        post.refresh_from_db()
+        assert post.is_draft and post.publish_at is None
+    assert f'{conflicting.pk}, {second.pk}' in caplog.text
+    assert Post.objects.next_due() is None
+
+
+#-- set_status() --#
+
+@pytest.fixture
+def notifications():
+    sent = []
+    def receiver(signal, **kwargs):
+        sent.append((signal, kwargs.get('states')))
+    published_posts_changed.connect(receiver)
+    published_set_changed.connect(receiver)
+    yield sent
+    published_posts_changed.disconnect(receiver)
+    published_set_changed.disconnect(receiver)
+
+
+@pytest.mark.django_db
+def test_set_status_published(post_factory):
+    june = datetime(2021, 6, 5, 12, tzinfo=timezone.utc)
+    draft = post_factory.create_draft(slug='draft')
+    hidden = post_factory.create_hidden(slug='hidden', published_at=june)
+    published = post_factory.create(slug='published')
+    updated_at = published.updated_at
+
+    assert Post.objects.all().set_status(Post.Status.PUBLISHED) == 2
+    for post in (draft, hidden, published):
+        post.refresh_from_db()
+        assert post.is_published
+        assert post.path == post._build_path()
+    assert_is_now(draft.published_at)
+    assert_is_now(draft.updated_at)
+    assert hidden.published_at == june
+    assert published.updated_at == updated_at
+
+
+@pytest.mark.django_db
+def test_set_status_draft(post_factory):
+    post = post_factory.create()
+    assert Post.objects.all().set_status(Post.Status.DRAFT) == 1
+    post.refresh_from_db()
+    assert post.is_draft
+    assert post.published_at is None and post.path is None
+
+
+@pytest.mark.django_db
+def test_set_status_hidden(post_factory):
+    june = datetime(2021, 6, 5, 12, tzinfo=timezone.utc)
+    published = post_factory.create(published_at=june)
+    draft = post_factory.create_draft()
+    assert Post.objects.all().set_status(Post.Status.HIDDEN) == 2
+    published.refresh_from_db()
+    draft.refresh_from_db()
+    assert published.published_at == june and published.path is not None
+    assert draft.published_at is None and draft.path is None
+
+
+@pytest.mark.django_db
+def test_set_status_keeps_summary(post_factory):
+    python = baker.make(Category, slug='python')
+    june = datetime(2021, 6, 5, 12, tzinfo=timezone.utc)
+    for i in range(3):
+        post_factory.create_hidden(published_at=june, categories=[python])
+
+    Post.objects.all().set_status(Post.Status.PUBLISHED)
+    assert MonthSummary.objects.get(month=date(2021, 6, 1)).post_count == 3
+    assert CategorySummary.objects.get(category=python).post_count == 3
+
+    Post.objects.filter(pk=Post.objects.first().pk).set_status(Post.Status.DRAFT)
+    assert MonthSummary.objects.get(month=date(2021, 6, 1)).post_count == 2
+    assert CategorySummary.objects.get(category=python).post_count == 2
+
+
+@pytest.mark.django_db
+def test_set_status_queries_independent_of_post_count(post_factory):
+    python = baker.make(Category, slug='python')
+    counts = []
+    # The first run also creates the summary rows.
+    for slug, count in [('first', 1), ('few', 2), ('many', 20)]:
+        for i in range(count):
+            post_factory.create_draft(slug=f'{slug}-{i}', categories=[python])
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.filter(slug__startswith=slug).set_status(Post.Status.PUBLISHED)
+        counts.append(len(queries))
+        Post.objects.filter(slug__startswith=slug).set_status(Post.Status.DRAFT)
+    assert counts[1] == counts[2]
+
+
+@pytest.mark.django_db
+def test_set_status_sends_one_notification(post_factory, notifications, on_commit):
+    python = baker.make(Category, slug='python')
+    for i in range(20):
+        post_factory.create_draft(slug=f'post-{i}', categories=[python])
+
+    with on_commit():
+        Post.objects.all().set_status(Post.Status.PUBLISHED)
+    assert [signal for signal, _ in notifications] == [published_posts_changed, published_set_changed]
+    states = notifications[0][1]
+    assert len(states) == 20
+    assert all(state.category_slugs == {'python'} for state in states)
+
+
+@pytest.mark.django_db
+def test_set_status_drafts_to_hidden_sends_nothing(post_factory, notifications, on_commit):
+    post_factory.create_draft()
+    with on_commit():
+        Post.objects.all().set_status(Post.Status.HIDDEN)
+    assert notifications == []
@@ -0,0 +1,247 @@
+import gzip
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+import pytest
+from .utils import get_content, tz_datetime
+from ..models import Category, Post
+from ..pagecache import (
+    GROUP_KEY_PREFIX, HOME_GROUP, PAGE_KEY_PREFIX, compress, groups_for_states, is_cacheable_request, peek_page,
+)
+from ..signals import PublishedState
+
+
+def _assert_cached(client, django_assert_num_queries, url):
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def _assert_not_cached(client, url):
+    response = client.get(url)
+    # Only freshly rendered responses carry their template context.
+    assert response.context is not None
+    # Streaming responses are cached once read in full.
+    get_content(response)
+    return response
+
+
+#-- groups_for_states() --#
+
+def test_groups_for_states():
+    states = [
+        PublishedState(tz_datetime(2021, 6, 5), 'old-slug', frozenset(['hiking'])),
+        PublishedState(tz_datetime(2021, 7, 1), 'new-slug', frozenset(['python'])),
+    ]
+    assert groups_for_states(states) == {
+        'home',
+        'year:2021',
+        'month:2021-06',
+        'month:2021-07',
+        'permalink:old-slug',
+        'permalink:new-slug',
+        'category:hiking',
+        'category:python',
+    }
+
+
+def test_groups_for_states_uses_current_time_zone():
+    # Midnight UTC on July 1st is still June in the project's time zone.
+    published_at = tz_datetime(2021, 6, 30, 20)
+    assert 'month:2021-06' in groups_for_states([PublishedState(published_at, 'x', frozenset())])
+
+
+#-- is_cacheable_request() --#
+
+@pytest.mark.parametrize('method,cookies,expected', [
+    ('GET', {}, True),
+    ('HEAD', {}, True),
+    ('POST', {}, False),
+    ('GET', {settings.SESSION_COOKIE_NAME: 'abc'}, False),
+])
+def test_is_cacheable_request(rf, method, cookies, expected):
+    request = rf.generic(method, '/')
+    request.COOKIES.update(cookies)
+    assert is_cacheable_request(request) is expected
+
+
+#-- peek_page() --#
+
+@pytest.mark.django_db
+def test_peek_page(rf, client, post_factory, django_assert_num_queries):
+    post_factory.create()
+    request = rf.get('/')
+    with django_assert_num_queries(0):
+        # Nothing is built in its place while the sidebar isn't cached.
+        assert peek_page(request, [HOME_GROUP]) is None
+    response = client.get('/')
+    with django_assert_num_queries(0):
+        assert peek_page(request, [HOME_GROUP]).content == response.content
+
+
+#-- Compressed pages --#
+
+def test_compress_skips_short_content():
+    assert compress(b'x' * 199) == {}
+    assert gzip.decompress(compress(b'x' * 200)['gzip']) == b'x' * 200
+
+
+@pytest.mark.django_db
+def test_hit_served_compressed(client, post_factory, django_assert_num_queries):
+    post_factory.create()
+    fresh = client.get('/')
+    assert 'Content-Encoding' not in fresh
+    assert fresh['Vary'] == 'Accept-Encoding'
+    with django_assert_num_queries(0):
+        response = client.get('/', HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.5')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Vary'] == 'Accept-Encoding'
+    assert response['ETag'] == 'W/' + fresh['ETag']
+    assert gzip.decompress(response.content) == fresh.content
+    assert client.get('/', HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+
+@pytest.mark.django_db
+def test_hit_served_in_brotli(client, post_factory):
+    brotli = pytest.importorskip('brotli')
+    post_factory.create()
+    fresh = client.get('/')
+    response = client.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == fresh.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('accept_encoding', ['', 'identity', 'gzip;q=0', 'deflate'])
+def test_hit_served_uncompressed(client, post_factory, accept_encoding):
+    post_factory.create()
+    fresh = client.get('/')
+    response = client.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert 'Content-Encoding' not in response
+    assert response.content == fresh.content
+    assert response['ETag'] == fresh['ETag']
+
+
+#-- Caching and purging through the views --#
+
+@pytest.mark.django_db
+def test_anonymous_reads_served_from_cache(client, post_factory, django_assert_num_queries):
+    category = baker.make(Category, slug='python')
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), categories=[category])
+    urls = ['/', '/2021/', '/2021/06/', '/categories/python/', post.get_absolute_url()]
+    for url in urls:
+        _assert_not_cached(client, url)
+    for url in urls:
+        _assert_cached(client, django_assert_num_queries, url)
+
+
+@pytest.mark.django_db
+def test_session_bypasses_cache(client, post_factory):
+    post_factory.create()
+    client.get('/')
+    client.cookies[settings.SESSION_COOKIE_NAME] = 'abc'
+    _assert_not_cached(client, '/')
+
+
+@pytest.mark.django_db
+def test_unread_params_share_cached_page(client, post_factory, django_assert_num_queries):
+    for day in range(1, 13):
+        post_factory.create(published_at=tz_datetime(2021, 6, day))
+    first = _assert_not_cached(client, '/')
+    _assert_cached(client, django_assert_num_queries, '/?utm_source=feed&x=1')
+    cursor = first.context['page_obj'].older_cursor
+    _assert_not_cached(client, f'/?before={cursor}')
+    _assert_cached(client, django_assert_num_queries, f'/?x=1&before={cursor}')
+
+
+@pytest.mark.django_db
+def test_pages_and_tokens_expire(client, post_factory):
+    post_factory.create()
+    client.get('/')
+    keys = [key for key in cache._cache if PAGE_KEY_PREFIX in key or GROUP_KEY_PREFIX in key]
+    assert len(keys) == 2
+    # The local memory backend records no expiry for entries stored without a timeout.
+    assert all(cache._expire_info[key] is not None for key in keys)
+
+
+@pytest.mark.django_db
+def test_errors_not_cached(client):
+    assert client.get('/2021/06/').status_code == 404
+    with CaptureQueriesContext(connection) as captured:
+        assert client.get('/2021/06/').status_code == 404
+    assert captured.captured_queries
+
+
+@pytest.mark.django_db
+def test_edit_purges_only_pages_showing_post(
+    client, post_factory, on_commit, django_assert_num_queries
+):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='edited')
+    post_factory.create(published_at=tz_datetime(2021, 5, 5), slug='other')
+    for url in ['/', '/2021/06/', '/2021/05/', '/2021/06/edited/', '/2021/05/other/']:
+        client.get(url)
+
+    with on_commit():
+        post.title = 'New, improved title'
+        post.save()
+
+    for url in ['/', '/2021/06/', '/2021/06/edited/']:
+        _assert_not_cached(client, url)
+    for url in ['/2021/05/', '/2021/05/other/']:
+        _assert_cached(client, django_assert_num_queries, url)
+
+
+@pytest.mark.django_db
+def test_recategorize_purges_old_and_new_categories(
+    client, post_factory, on_commit, django_assert_num_queries
+):
+    c1 = baker.make(Category, slug='hiking')
+    c2 = baker.make(Category, slug='python')
+    c3 = baker.make(Category, slug='baseball')
+    post = post_factory.create(categories=[c1])
+    post_factory.create(categories=[c2, c3])
+    for slug in ('hiking', 'python', 'baseball'):
+        get_content(client.get(f'/categories/{slug}/'))
+
+    with on_commit():
+        post.categories.set([c2])
+
+    # The sidebar no longer lists "hiking", so every page is stale.
+    _assert_not_cached(client, '/categories/baseball/')
+    for slug in ('hiking', 'python', 'baseball'):
+        get_content(client.get(f'/categories/{slug}/'))
+
+    with on_commit():
+        post.categories.set([c2, c1])
+    _assert_not_cached(client, '/categories/hiking/')
+    _assert_cached(client, django_assert_num_queries, '/categories/baseball/')
+
+
+@pytest.mark.django_db
+def test_unpublish_purges_old_month(client, post_factory, on_commit):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    post_factory.create(published_at=tz_datetime(2021, 6, 8))
+    client.get('/2021/06/')
+
+    with on_commit():
+        post = Post.objects.get(pk=post.pk)
+        post.status = Post.Status.HIDDEN
+        post.save()
+
+    response = _assert_not_cached(client, '/2021/06/')
+    assert post not in response.context['posts']
+
+
+@pytest.mark.django_db
+def test_draft_edit_purges_nothing(client, post_factory, on_commit, django_assert_num_queries):
+    post_factory.create()
+    draft = post_factory.create_draft()
+    client.get('/')
+
+    with on_commit():
+        draft.title = 'New, improved title'
+        draft.save()
+    _assert_cached(client, django_assert_num_queries, '/')
@@ -0,0 +1,95 @@
+import pytest
+from .utils import tz_datetime
+from ..models import Post
+from ..pagination import InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor
+
+
+def _paginator(per_page=2):
+    return KeysetPaginator(Post.objects.published(), per_page)
+
+
+#-- encode_cursor() / decode_cursor() --#
+
+def test_cursor_round_trip():
+    published_at = tz_datetime(2021, 6, 5, 13, 30, 15)
+    post = Post(pk=42, published_at=published_at)
+    assert decode_cursor(encode_cursor(post)) == (published_at, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'abc', '12_', '1_2_3', '9' * 40 + '_1', None])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+#-- KeysetPaginator.page() --#
+
+@pytest.mark.django_db
+def test_first_page(post_factory):
+    p1 = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    p2 = post_factory.create(published_at=tz_datetime(2021, 6, 4))
+    post_factory.create(published_at=tz_datetime(2021, 6, 3))
+
+    page = _paginator().page()
+    assert list(page) == [p1, p2]
+    assert page.has_next() and not page.has_previous()
+    assert page.newer_cursor is None
+    assert page.older_cursor == encode_cursor(p2)
+
+
+@pytest.mark.django_db
+def test_walk_older_then_newer(post_factory):
+    p1 = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    p2 = post_factory.create(published_at=tz_datetime(2021, 6, 4))
+    p3 = post_factory.create(published_at=tz_datetime(2021, 6, 3))
+    paginator = _paginator()
+
+    older = paginator.page(before=paginator.page().older_cursor)
+    assert list(older) == [p3]
+    assert older.has_previous() and not older.has_next()
+
+    newer = paginator.page(after=older.newer_cursor)
+    assert list(newer) == [p1, p2]
+    assert newer.has_next() and not newer.has_previous()
+
+
+@pytest.mark.django_db
+def test_ties_on_published_at_broken_by_id(post_factory):
+    published_at = tz_datetime(2021, 6, 5)
+    posts = [post_factory.create(published_at=published_at) for _ in range(5)]
+    paginator = _paginator()
+
+    seen = []
+    page = paginator.page()
+    seen.extend(page)
+    while page.has_next():
+        page = paginator.page(before=page.older_cursor)
+        seen.extend(page)
+    assert seen == sorted(posts, key=lambda post: post.pk, reverse=True)
+
+
+@pytest.mark.django_db
+def test_page_excludes_unpublished(post_factory):
+    p1 = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    post_factory.create_draft()
+    post_factory.create_hidden(published_at=tz_datetime(2021, 6, 4))
+
+    page = _paginator().page()
+    assert list(page) == [p1]
+    assert not page.has_other_pages()
+
+
+def test_page_both_cursors():
+    with pytest.raises(InvalidCursor):
+        _paginator().page(before='1_1', after='1_1')
+
+
+@pytest.mark.django_db
+def test_page_never_counts(post_factory, django_assert_num_queries):
+    for day in range(1, 6):
+        post_factory.create(published_at=tz_datetime(2021, 6, day))
+    paginator = _paginator()
+    cursor = encode_cursor(Post.objects.first())
+    with django_assert_num_queries(1) as captured:
+        list(paginator.page(before=cursor))
+    assert 'COUNT(' not in captured.captured_queries[0]['sql'].upper()
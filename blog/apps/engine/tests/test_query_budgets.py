@@ -0,0 +1,56 @@
+"""Checks every public view stays within its query budget whatever the size of the corpus."""
+import logging
+import pytest
+from .. import benchmark
+from ..views import HomeView, PostFeedView
+from .utils import assert_within_query_budget
+
+
+@pytest.fixture(params=[1, 25, 120])
+def corpus(request, db):
+    return benchmark.build_corpus(request.param, 8, seed=request.param)
+
+
+@pytest.mark.django_db
+def test_views_within_budget(client, corpus):
+    urls = benchmark.get_urls()
+    assert urls
+    for url in urls:
+        assert_within_query_budget(client, url)
+
+
+@pytest.fixture
+def budget_middleware(settings):
+    settings.MIDDLEWARE = [
+        'blog.apps.engine.querybudget.QueryBudgetMiddleware', *settings.MIDDLEWARE
+    ]
+
+
+@pytest.mark.django_db
+def test_middleware_logs_violations(client, post_factory, budget_middleware, monkeypatch, caplog):
+    post_factory.create()
+    monkeypatch.setattr(HomeView, 'query_budget', 1)
+    with caplog.at_level(logging.WARNING, logger='blog.apps.engine.querybudget'):
+        client.get('/')
+    assert 'over the budget of 1 for home' in caplog.text
+
+
+@pytest.mark.django_db
+def test_middleware_checks_streamed_content(
+    client, post_factory, budget_middleware, monkeypatch, caplog
+):
+    post_factory.create()
+    monkeypatch.setattr(PostFeedView, 'query_budget', 1)
+    with caplog.at_level(logging.WARNING, logger='blog.apps.engine.querybudget'):
+        response = client.get('/feeds/atom/')
+        assert caplog.text == ''
+        b''.join(response.streaming_content)
+    assert 'over the budget of 1 for feed' in caplog.text
+
+
+@pytest.mark.django_db
+def test_middleware_quiet_within_budget(client, post_factory, budget_middleware, caplog):
+    post_factory.create()
+    with caplog.at_level(logging.WARNING, logger='blog.apps.engine.querybudget'):
+        client.get('/')
+    assert caplog.text == ''
@@ -0,0 +1,97 @@
+"""Guards the public views against query plans that fall back to full table scans.
+
+Each view is requested and every query it issues is run back through the database's
+planner. The assertions are written against SQLite's EXPLAIN QUERY PLAN output, in
+which a full table scan is reported as a SCAN without an accompanying index.
+
+"""
+import re
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+import pytest
+from .utils import tz_datetime
+from ..models import Category, Post
+from ..pagination import encode_cursor
+
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Query plan assertions target SQLite.'
+)
+
+FULL_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(engine_post\w*)(?! USING)\b')
+
+
+def _full_scans(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    return [line for line in plan if FULL_SCAN_RE.search(line)]
+
+
+def _assert_no_full_scans(client, url, params=None):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url, params)
+    assert response.status_code == 200
+
+    offenders = {
+        query['sql']: scans for query in captured.captured_queries
+        if query['sql'].startswith('SELECT') and (scans := _full_scans(query['sql']))
+    }
+    assert not offenders
+
+
+@pytest.fixture
+def corpus(post_factory):
+    category = baker.make(Category, slug='python')
+    posts = [
+        post_factory.create(
+            published_at=tz_datetime(2021, month, day), 
+            slug=f'post-{month}-{day}', 
+            categories=[category]
+        )
+        for month in (5, 6) for day in range(1, 8)
+    ]
+    post_factory.create_draft(categories=[category])
+    post_factory.create_hidden(published_at=tz_datetime(2021, 6, 9))
+    return posts
+
+
+@pytest.mark.django_db
+def test_home(client, corpus):
+    _assert_no_full_scans(client, '/')
+
+
+@pytest.mark.django_db
+def test_home_deep_page(client, corpus):
+    _assert_no_full_scans(client, '/', {'before': encode_cursor(corpus[3])})
+
+
+@pytest.mark.django_db
+def test_year_archive(client, corpus):
+    _assert_no_full_scans(client, '/2021/')
+
+
+@pytest.mark.django_db
+def test_month_archive(client, corpus):
+    _assert_no_full_scans(client, '/2021/06/')
+
+
+@pytest.mark.django_db
+def test_category_archive(client, corpus):
+    _assert_no_full_scans(client, '/categories/python/')
+
+
+@pytest.mark.django_db
+def test_permalink(client, corpus):
+    _assert_no_full_scans(client, corpus[0].get_absolute_url())
+
+
+@pytest.mark.django_db
+def test_next_due(corpus):
+    queryset = Post.objects.scheduled().order_by('publish_at').values_list('publish_at')
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = ' '.join(row[-1] for row in cursor.fetchall())
+    assert 'engine_post_publish_at_idx' in plan
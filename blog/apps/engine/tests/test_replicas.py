@@ -0,0 +1,121 @@
+import asyncio
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import transaction
+from django.test import AsyncClient
+import pytest
+from .utils import get_content
+from ..models import Post
+from ..replicas import (
+    PIN_ALL_CACHE_KEY, PIN_COOKIE_NAME, PrimaryReplicaRouter, ReplicaPinningMiddleware, check_shared_cache,
+)
+
+databases = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+@pytest.fixture
+def post(post_factory):
+    """A post written to the primary, which the empty replica is yet to catch up with."""
+    post = post_factory.create(title='Fresh post')
+    cache.delete(PIN_ALL_CACHE_KEY)
+    return post
+
+
+#-- PrimaryReplicaRouter --#
+
+def test_router_without_replicas():
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) is None
+    assert router.db_for_write(Post) is None
+
+
+@databases
+def test_router(replicas):
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) == 'replica'
+    assert router.db_for_write(Post) == 'default'
+    with transaction.atomic():
+        assert router.db_for_read(Post) == 'default'
+
+
+#-- ReplicaPinningMiddleware --#
+
+@databases
+def test_public_reads_from_replica(replicas, client, post):
+    assert 'Fresh post' not in client.get('/').content.decode()
+    assert client.get(post.get_absolute_url()).status_code == 404
+
+
+@databases
+def test_pin_cookie_reads_from_primary(replicas, client, post):
+    client.cookies[PIN_COOKIE_NAME] = '1'
+    assert 'Fresh post' in client.get('/').content.decode()
+
+
+@databases
+def test_pin_holds_while_streaming(replicas, client, post):
+    client.cookies[PIN_COOKIE_NAME] = '1'
+    response = client.get('/feeds/atom/')
+    assert response.streaming
+    assert 'Fresh post' in get_content(response)
+
+
+@databases
+def test_write_sets_pin_cookie(replicas, admin_client, post):
+    response = admin_client.post('/admin/engine/post/', {
+        'action': 'hide', '_selected_action': [post.pk],
+    })
+    assert response.cookies[PIN_COOKIE_NAME]['max-age'] == 10
+    assert not Post.objects.using('default').get().is_published
+
+
+@databases
+def test_published_change_pins_everyone(replicas, client, post):
+    post.title = 'Edited post'
+    post.save()
+    assert 'Edited post' in client.get('/').content.decode()
+
+
+@databases
+def test_read_sets_no_cookie(replicas, client, post):
+    assert PIN_COOKIE_NAME not in client.get('/').cookies
+
+
+@pytest.mark.django_db
+def test_middleware_unused_without_replicas(client, post):
+    assert 'Fresh post' in client.get('/').content.decode()
+
+
+@databases
+def test_middleware_runs_async(replicas, settings, post):
+    async def get_response(request):
+        pass
+    assert asyncio.iscoroutinefunction(ReplicaPinningMiddleware(get_response))
+
+    settings.ROOT_URLCONF = 'blog.asgi_urls'
+    client = AsyncClient()
+
+    @async_to_sync
+    async def get(url):
+        return await client.get(url)
+
+    assert 'Fresh post' not in get('/').content.decode()
+    # Or the page cached from the replica would be served.
+    cache.clear()
+    client.cookies[PIN_COOKIE_NAME] = '1'
+    assert 'Fresh post' in get('/').content.decode()
+
+
+#-- check_shared_cache() --#
+
+def test_check_shared_cache(settings):
+    assert check_shared_cache(None) == []
+    settings.DATABASE_REPLICAS = ['replica']
+    assert [warning.id for warning in check_shared_cache(None)] == ['engine.W001']
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache'}}
+    assert check_shared_cache(None) == []
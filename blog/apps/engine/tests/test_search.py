@@ -0,0 +1,76 @@
+import pytest
+from ..models import Post
+from ..search import fts5_query
+
+
+#-- fts5_query() --#
+
+def test_fts5_query_quotes_terms():
+    assert fts5_query('django  "orm" OR NOT*') == '"django" """orm""" "OR" "NOT*"'
+
+
+def test_fts5_query_drops_control_characters():
+    assert fts5_query('django\x00orm\x1b') == '"django" "orm"'
+
+
+#-- PostQuerySet.matching() / search() --#
+
+@pytest.mark.django_db
+def test_matching(post_factory):
+    p1 = post_factory.create(title='Hiking the Alps', content='Mountains everywhere.')
+    p2 = post_factory.create(title='Python tips', content='Also some hiking.')
+    post_factory.create(title='Baseball', content='Nothing to see.')
+    assert set(Post.objects.matching('hiking')) == {p1, p2}
+
+
+@pytest.mark.django_db
+def test_matching_requires_every_term(post_factory):
+    p1 = post_factory.create(title='Hiking with Python', content='')
+    post_factory.create(title='Hiking the Alps', content='')
+    assert list(Post.objects.matching('python hiking')) == [p1]
+
+
+@pytest.mark.django_db
+def test_matching_stems_terms(post_factory):
+    p1 = post_factory.create(title='Hikes', content='')
+    assert list(Post.objects.matching('hiking')) == [p1]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['', '   '])
+def test_matching_empty_query(post_factory, query):
+    post_factory.create()
+    assert list(Post.objects.matching(query)) == []
+
+
+@pytest.mark.django_db
+def test_matching_syntax_is_literal(post_factory):
+    post_factory.create(title='Hiking', content='')
+    assert list(Post.objects.matching('hiking OR "')) == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(post_factory):
+    p1 = post_factory.create(title='Notes', content='A word about hiking.')
+    p2 = post_factory.create(title='Hiking', content='A long walk.')
+    results = list(Post.objects.search('hiking'))
+    assert results == [p2, p1]
+    assert results[0].rank > results[1].rank
+
+
+#-- Index maintenance --#
+
+@pytest.mark.django_db
+def test_index_follows_edits(post_factory):
+    post = post_factory.create(title='Hiking', content='')
+    post.title = 'Baseball'
+    post.save()
+    assert list(Post.objects.matching('hiking')) == []
+    assert list(Post.objects.matching('baseball')) == [post]
+
+
+@pytest.mark.django_db
+def test_index_follows_deletes(post_factory):
+    post = post_factory.create(title='Hiking', content='')
+    post.delete()
+    assert list(Post.objects.matching('hiking')) == []
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+import pytest
+from ..servertiming import ServerTimingMiddleware, Timings, timed
+
+
+def _metrics(response):
+    return {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+
+
+def test_timed_without_request():
+    with timed('anything'):
+        pass
+
+
+def test_header():
+    timings = Timings()
+    timings.add('db', 0.002)
+    timings.add('db', 0.001)
+    timings.add('view', 0.0105)
+    assert timings.header() == 'db;dur=3.0;desc="2 queries", view;dur=10.5'
+
+
+@pytest.mark.django_db
+def test_breakdown(settings, client, post_factory):
+    settings.SERVER_TIMING = True
+    post_factory.create()
+    metrics = _metrics(client.get('/'))
+    assert metrics.keys() == {
+        'db', 'ctx', 'archive-links', 'tpl', 'render-posts', 'view', 'total'
+    }
+    assert metrics['db'].endswith(';desc="5 queries"')
+
+
+@pytest.mark.django_db
+def test_async_breakdown(settings, post_factory):
+    settings.SERVER_TIMING = True
+    async def get_response(request):
+        pass
+    middleware = ServerTimingMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    assert asyncio.iscoroutinefunction(middleware.process_view)
+
+    settings.ROOT_URLCONF = 'blog.asgi_urls'
+    client = AsyncClient()
+
+    @async_to_sync
+    async def get(url):
+        return await client.get(url)
+
+    post_factory.create()
+    metrics = _metrics(get('/'))
+    # The async view renders its own template, in the worker thread its queries run in.
+    assert metrics.keys() == {'db', 'ctx', 'archive-links', 'render-posts', 'view', 'total'}
+    assert metrics['db'].endswith(';desc="5 queries"')
+
+
+@pytest.mark.django_db
+def test_streaming_response(settings, client, post_factory):
+    settings.SERVER_TIMING = True
+    post_factory.create()
+    metrics = _metrics(client.get('/feeds/atom/'))
+    assert {'db', 'view', 'total'} <= metrics.keys()
+    assert 'tpl' not in metrics
+
+
+@pytest.mark.django_db
+def test_log(settings, client, post_factory, caplog):
+    settings.SERVER_TIMING = True
+    settings.SERVER_TIMING_LOG = True
+    post_factory.create()
+    with caplog.at_level(logging.INFO, logger='blog.apps.engine.servertiming'):
+        client.get('/')
+    record, = caplog.records
+    assert record.getMessage().startswith('GET / 200 db;dur=')
+    assert record.query_count == 5
+    assert record.server_timing.keys() >= {'db', 'total'}
+
+
+@pytest.mark.django_db
+def test_disabled(client, post_factory):
+    post_factory.create()
+    assert not client.get('/').has_header('Server-Timing')
@@ -0,0 +1,191 @@
+from model_bakery import baker
+import pytest
+from .utils import tz_datetime
+from ..models import Category, Post
+from ..signals import PublishedState, published_posts_changed, published_set_changed
+
+
+@pytest.fixture
+def notifications():
+    """Collects the published_set_changed notifications sent during a test."""
+    sent = []
+    def _receiver(**kwargs):
+        sent.append(kwargs)
+    published_set_changed.connect(_receiver)
+    yield sent
+    published_set_changed.disconnect(_receiver)
+
+
+#-- Post saves --#
+
+@pytest.mark.django_db
+def test_publish_notifies(post_factory, notifications, on_commit):
+    post = post_factory.create_draft()
+    with on_commit():
+        post.status = Post.Status.PUBLISHED
+        post.save()
+    assert len(notifications) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('status', [Post.Status.DRAFT, Post.Status.HIDDEN])
+def test_unpublish_notifies(post_factory, notifications, on_commit, status):
+    post = Post.objects.get(pk=post_factory.create().pk)
+    with on_commit():
+        post.status = status
+        post.save()
+    assert len(notifications) == 1
+
+
+@pytest.mark.django_db
+def test_notification_waits_for_commit(post_factory, notifications):
+    post = post_factory.create_draft()
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    assert notifications == []
+
+
+@pytest.mark.django_db
+def test_edit_published_does_not_notify(post_factory, notifications, on_commit):
+    post = Post.objects.get(pk=post_factory.create().pk)
+    with on_commit():
+        post.title = 'New, improved title'
+        post.save()
+    assert notifications == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('before,after', [
+    (Post.Status.DRAFT, Post.Status.PUBLISHED),
+    (Post.Status.PUBLISHED, Post.Status.HIDDEN),
+])
+def test_edit_after_refresh_does_not_notify(post_factory, notifications, on_commit, before, after):
+    post = post_factory.create(status=before, published_at=None)
+    Post.objects.filter(pk=post.pk).set_status(after)
+    post.refresh_from_db()
+    with on_commit():
+        post.title = 'New, improved title'
+        post.save()
+    assert notifications == []
+
+
+@pytest.mark.django_db
+def test_edit_draft_does_not_notify(post_factory, notifications, on_commit):
+    post = post_factory.create_draft()
+    with on_commit():
+        post.title = 'New, improved title'
+        post.save()
+        post.categories.add(baker.make(Category))
+    assert notifications == []
+
+
+#-- Deletions and categorization --#
+
+@pytest.mark.django_db
+def test_delete_published_notifies(post_factory, notifications, on_commit):
+    post = Post.objects.get(pk=post_factory.create().pk)
+    with on_commit():
+        post.delete()
+    assert len(notifications) == 1
+
+
+@pytest.mark.django_db
+def test_categorize_published_notifies(post_factory, notifications, on_commit):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    with on_commit():
+        post.categories.add(baker.make(Category))
+    assert len(notifications) == 1
+
+
+@pytest.mark.django_db
+def test_rename_category_with_published_posts_notifies(post_factory, notifications, on_commit):
+    category = baker.make(Category)
+    post_factory.create(categories=[category])
+    with on_commit():
+        category.name = 'Renamed'
+        category.save()
+    assert len(notifications) == 1
+
+
+@pytest.mark.django_db
+def test_rename_category_without_published_posts_does_not_notify(
+    post_factory, notifications, on_commit
+):
+    category = baker.make(Category)
+    post_factory.create_draft(categories=[category])
+    with on_commit():
+        category.name = 'Renamed'
+        category.save()
+    assert notifications == []
+
+
+#-- published_posts_changed --#
+
+@pytest.fixture
+def post_notifications():
+    """Collects the states sent with each published_posts_changed notification."""
+    sent = []
+    def _receiver(states, **kwargs):
+        sent.append(set(states))
+    published_posts_changed.connect(_receiver)
+    yield sent
+    published_posts_changed.disconnect(_receiver)
+
+
+@pytest.mark.django_db
+def test_edit_published_sends_states(post_factory, post_notifications, on_commit):
+    category = baker.make(Category, slug='python')
+    post = post_factory.create(
+        published_at=tz_datetime(2021, 6, 5), slug='old', categories=[category]
+    )
+    with on_commit():
+        post.slug = 'new'
+        post.save()
+    assert post_notifications == [{
+        PublishedState(tz_datetime(2021, 6, 5), 'old', frozenset(['python'])),
+        PublishedState(tz_datetime(2021, 6, 5), 'new', frozenset(['python'])),
+    }]
+
+
+@pytest.mark.django_db
+def test_hide_sends_old_state_only(post_factory, post_notifications, on_commit):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='hidden')
+    with on_commit():
+        post.status = Post.Status.HIDDEN
+        post.save()
+    assert post_notifications == [{PublishedState(tz_datetime(2021, 6, 5), 'hidden', frozenset())}]
+
+
+@pytest.mark.django_db
+def test_uncategorize_sends_removed_category(post_factory, post_notifications, on_commit):
+    c1 = baker.make(Category, slug='hiking')
+    c2 = baker.make(Category, slug='python')
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='p', categories=[c1, c2])
+    with on_commit():
+        post.categories.remove(c1)
+    assert post_notifications == [
+        {PublishedState(tz_datetime(2021, 6, 5), 'p', frozenset(['hiking', 'python']))}
+    ]
+
+
+@pytest.mark.django_db
+def test_clear_category_posts_sends_published_posts(post_factory, post_notifications, on_commit):
+    category = baker.make(Category, slug='python')
+    post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='p', categories=[category])
+    post_factory.create_draft(categories=[category])
+    with on_commit():
+        category.posts.clear()
+    assert post_notifications == [
+        {PublishedState(tz_datetime(2021, 6, 5), 'p', frozenset(['python']))}
+    ]
+
+
+@pytest.mark.django_db
+def test_delete_published_sends_state(post_factory, post_notifications, on_commit):
+    category = baker.make(Category, slug='python')
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='p', categories=[category])
+    with on_commit():
+        post.delete()
+    assert post_notifications == [
+        {PublishedState(tz_datetime(2021, 6, 5), 'p', frozenset(['python']))}
+    ]
@@ -0,0 +1,89 @@
+from xml.etree import ElementTree
+from model_bakery import baker
+import pytest
+from .. import sitemaps
+from ..models import Category, Post
+from .utils import tz_datetime
+
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def _get_xml(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/xml; charset=utf-8'
+    return ElementTree.fromstring(b''.join(response.streaming_content))
+
+
+def _locs(root):
+    return [loc.text for loc in root.iter(f'{SITEMAP}loc')]
+
+
+@pytest.mark.django_db
+def test_archive_rows(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    p1 = post_factory.create(published_at=tz_datetime(2020, 6, 5), categories=[hiking])
+    p2 = post_factory.create(published_at=tz_datetime(2021, 5, 3))
+    post_factory.create_hidden(published_at=tz_datetime(2019, 5, 3), categories=[hiking])
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+
+    assert list(sitemaps.archive_rows()) == [
+        ('/', p2.updated_at),
+        ('/2021/', p2.updated_at),
+        ('/2020/', p1.updated_at),
+        ('/2021/05/', p2.updated_at),
+        ('/2020/06/', p1.updated_at),
+        ('/categories/hiking/', p1.updated_at),
+    ]
+
+
+@pytest.mark.django_db
+def test_post_rows_are_sharded_by_id(monkeypatch, post_factory):
+    monkeypatch.setattr(sitemaps, 'SITEMAP_LIMIT', 2)
+    posts = [post_factory.create() for _ in range(5)]
+    post_factory.create_draft()
+    first_shard = (posts[0].pk - 1) // 2
+
+    assert [path for path, _ in sitemaps.post_rows()] == [post.path for post in posts]
+    assert sitemaps.post_shards() == sorted({(post.pk - 1) // 2 for post in posts})
+    assert len(list(sitemaps.post_rows(first_shard))) <= 2
+
+
+@pytest.mark.django_db
+def test_post_rows_skip_posts_without_paths(post_factory):
+    post = post_factory.create()
+    Post.objects.filter(pk=post_factory.create().pk).update(path=None)
+    assert [path for path, _ in sitemaps.post_rows()] == [post.path]
+
+
+@pytest.mark.django_db
+def test_sitemap(client, post_factory):
+    post = post_factory.create(published_at=tz_datetime(2021, 5, 3), slug='a-post')
+    post_factory.create_draft()
+    root = _get_xml(client, '/sitemap.xml')
+    assert root.tag == f'{SITEMAP}urlset'
+    assert _locs(root) == [
+        'http://testserver/', 'http://testserver/2021/', 'http://testserver/2021/05/',
+        'http://testserver/2021/05/a-post/',
+    ]
+    lastmods = [lastmod.text for lastmod in root.iter(f'{SITEMAP}lastmod')]
+    assert lastmods[-1] == post.updated_at.isoformat(timespec='seconds')
+
+
+@pytest.mark.django_db
+def test_sitemap_index_past_limit(monkeypatch, client, post_factory):
+    monkeypatch.setattr(sitemaps, 'SITEMAP_LIMIT', 4)
+    posts = [post_factory.create(published_at=tz_datetime(2021, 5, 3)) for _ in range(3)]
+
+    root = _get_xml(client, '/sitemap.xml')
+    assert root.tag == f'{SITEMAP}sitemapindex'
+    shard_urls = [
+        f'http://testserver/sitemap-posts-{shard}.xml' for shard in sitemaps.post_shards()
+    ]
+    assert _locs(root) == ['http://testserver/sitemap-archives.xml', *shard_urls]
+
+    assert len(_locs(_get_xml(client, '/sitemap-archives.xml'))) == 3
+    shard_locs = [loc for url in shard_urls for loc in _locs(_get_xml(client, url))]
+    assert shard_locs == [f'http://testserver{post.path}' for post in posts]
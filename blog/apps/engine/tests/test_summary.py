@@ -0,0 +1,125 @@
+from datetime import date, datetime, timezone
+from model_bakery import baker
+import pytest
+from .. import summary
+from ..models import Category, CategorySummary, MonthSummary, Post
+from .utils import tz_datetime
+
+
+def _months():
+    return dict(MonthSummary.objects.filter(post_count__gt=0).values_list('month', 'post_count'))
+
+
+def _categories():
+    return dict(
+        CategorySummary.objects.filter(post_count__gt=0).values_list('category__slug', 'post_count')
+    )
+
+
+@pytest.mark.django_db
+def test_publish_and_unpublish(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    post = post_factory.create_draft(categories=[hiking])
+    assert _months() == {} and _categories() == {}
+
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    month = summary.month_of(post.published_at)
+    assert _months() == {month: 1}
+    assert _categories() == {'hiking': 1}
+
+    post.status = Post.Status.HIDDEN
+    post.save()
+    assert _months() == {} and _categories() == {}
+
+
+@pytest.mark.django_db
+def test_edits_leave_counts_alone(post_factory):
+    post = post_factory.create(published_at=tz_datetime(2021, 5, 3))
+    post.title = 'Renamed'
+    post.save()
+    assert _months() == {date(2021, 5, 1): 1}
+
+
+@pytest.mark.django_db
+def test_saves_after_refresh_leave_counts_alone(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    post = post_factory.create_draft(categories=[hiking])
+    Post.objects.filter(pk=post.pk).set_status(Post.Status.PUBLISHED)
+    post.refresh_from_db()
+    post.title = 'Renamed'
+    post.save()
+    assert _months() == {summary.month_of(post.published_at): 1}
+    assert _categories() == {'hiking': 1}
+
+    Post.objects.filter(pk=post.pk).set_status(Post.Status.HIDDEN)
+    post.refresh_from_db()
+    post.title = 'Renamed again'
+    post.save()
+    post.delete()
+    assert MonthSummary.objects.get().post_count == 0
+    assert CategorySummary.objects.get().post_count == 0
+
+
+@pytest.mark.django_db
+def test_month_is_bucketed_in_current_time_zone(post_factory):
+    # 03:00 UTC on June 1st is still May 31st in Detroit.
+    post_factory.create(published_at=datetime(2021, 6, 1, 3, tzinfo=timezone.utc))
+    assert _months() == {date(2021, 5, 1): 1}
+
+
+@pytest.mark.django_db
+def test_recategorize(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    python = baker.make(Category, slug='python')
+    post = post_factory.create(categories=[hiking])
+    post_factory.create_draft(categories=[hiking, python])
+
+    post.categories.set([python])
+    assert _categories() == {'python': 1}
+
+    # Removing a category the post isn't in changes nothing.
+    post.categories.remove(hiking)
+    post.categories.add(hiking)
+    assert _categories() == {'hiking': 1, 'python': 1}
+
+    post.categories.clear()
+    assert _categories() == {}
+
+
+@pytest.mark.django_db
+def test_recategorize_from_category_side(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    published = post_factory.create()
+    draft = post_factory.create_draft()
+
+    hiking.posts.add(published, draft)
+    assert _categories() == {'hiking': 1}
+    hiking.posts.clear()
+    assert _categories() == {}
+
+
+@pytest.mark.django_db
+def test_delete(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    post = post_factory.create(published_at=tz_datetime(2021, 5, 3), categories=[hiking])
+    post_factory.create(published_at=tz_datetime(2021, 5, 9))
+
+    post.delete()
+    assert _months() == {date(2021, 5, 1): 1}
+    assert _categories() == {}
+
+
+@pytest.mark.django_db
+def test_rebuild(post_factory):
+    hiking = baker.make(Category, slug='hiking')
+    post_factory.create(published_at=tz_datetime(2021, 5, 3), categories=[hiking])
+    post_factory.create(published_at=tz_datetime(2021, 5, 9))
+    post_factory.create_hidden(published_at=tz_datetime(2021, 6, 9), categories=[hiking])
+    expected = (_months(), _categories())
+
+    MonthSummary.objects.update(post_count=7)
+    CategorySummary.objects.all().delete()
+    summary.rebuild()
+    assert (_months(), _categories()) == expected
+    assert expected == ({date(2021, 5, 1): 2}, {'hiking': 1})
@@ -0,0 +1,88 @@
+from django.template import Context, Template
+from django.test.signals import template_rendered
+from django.utils import timezone
+from model_bakery import baker
+import pytest
+from ..models import Category, Post
+
+
+@pytest.fixture
+def render():
+    def _render(posts, options=''):
+        template = Template('{% load blogtools %}{% render_posts posts ' + options + ' %}')
+        rendered = []
+        receiver = lambda template, **kwargs: rendered.append(template.name)
+        template_rendered.connect(receiver)
+        try:
+            content = template.render(Context({'posts': posts}))
+        finally:
+            template_rendered.disconnect(receiver)
+        return content, rendered.count('_post.html')
+    return _render
+
+
+def _fetch():
+    return list(Post.objects.published().prefetch_related('categories'))
+
+
+#-- render_posts() --#
+
+@pytest.mark.django_db
+def test_fragments_cached(render, post_factory, django_assert_num_queries):
+    post_factory.create(title='First')
+    post_factory.create(title='Second')
+    posts = _fetch()
+    content, render_count = render(posts)
+    assert 'First' in content and 'Second' in content
+    assert render_count == 2
+
+    with django_assert_num_queries(0):
+        cached_content, render_count = render(posts)
+    assert cached_content == content
+    assert render_count == 0
+
+
+@pytest.mark.django_db
+def test_fragments_shared_between_pages(render, post_factory):
+    post = post_factory.create()
+    post_factory.create()
+    render(_fetch())
+    # The post on its own, as on a category page, reuses its fragment from the longer list.
+    assert render(Post.objects.filter(pk=post.pk).prefetch_related('categories'))[1] == 0
+    # Other options render a fragment of their own.
+    assert render(_fetch(), "header_tag='h1'")[1] == 2
+
+
+@pytest.mark.django_db
+def test_edit_rerenders_fragment(render, post_factory):
+    post = post_factory.create(title='Before')
+    render(_fetch())
+    post.title = 'After'
+    post.save()
+    content, render_count = render(_fetch())
+    assert 'After' in content
+    assert render_count == 1
+
+
+@pytest.mark.django_db
+def test_category_changes_rerender_fragment(render, post_factory):
+    post = post_factory.create()
+    category = baker.make(Category, name='Python', slug='python')
+    render(_fetch())
+
+    post.categories.add(category)
+    content, render_count = render(_fetch())
+    assert 'Python' in content and render_count == 1
+
+    category.name = 'Django'
+    category.save()
+    content, render_count = render(_fetch())
+    assert 'Django' in content and render_count == 1
+
+
+@pytest.mark.django_db
+def test_time_zone_rerenders_fragment(render, post_factory):
+    post_factory.create()
+    render(_fetch())
+    with timezone.override('Asia/Tokyo'):
+        assert render(_fetch())[1] == 1
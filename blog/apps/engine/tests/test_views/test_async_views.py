@@ -0,0 +1,101 @@
+import asyncio
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+import pytest
+from pytest_django.asserts import assertContains
+from ..utils import tz_datetime
+from ... import pagecache
+from ...models import Category
+
+
+@pytest.fixture
+def async_get(settings):
+    settings.ROOT_URLCONF = 'blog.asgi_urls'
+    client = AsyncClient()
+
+    @async_to_sync
+    async def get(url, headers=None):
+        # The async client takes headers by their HTTP names.
+        return await client.get(url, **(headers or {}))
+    return get
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/', '/2021/', '/2021/06/', '/categories/python/'])
+def test_archives(async_get, post_factory, url):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), title='Async post')
+    post.categories.add(Category.objects.create(name='Python', slug='python'))
+    response = async_get(url)
+    assert response.status_code == 200
+    assertContains(response, 'Async post')
+    # The sidebar is rendered from the links loaded along with the posts.
+    assertContains(response, '<a href="/categories/python/">Python</a>')
+
+
+@pytest.mark.django_db
+def test_permalink(async_get, post_factory):
+    post = post_factory.create(title='Async post')
+    response = async_get(post.get_absolute_url())
+    assertContains(response, 'Async post')
+    assert response['ETag']
+
+
+@pytest.mark.django_db
+def test_not_found(async_get):
+    assert async_get('/2021/06/missing/').status_code == 404
+    assert async_get('/2021/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_cache_hit(async_get, post_factory, django_assert_num_queries):
+    post_factory.create()
+    first = async_get('/')
+    with django_assert_num_queries(0):
+        second = async_get('/')
+    assert second.content == first.content
+
+    with django_assert_num_queries(0):
+        response = async_get('/', headers={'If-None-Match': first['ETag']})
+    assert response.status_code == 304
+
+
+def _on_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/', '/categories/python/'])
+def test_cache_off_event_loop(async_get, post_factory, monkeypatch, url):
+    post = post_factory.create()
+    post.categories.add(Category.objects.create(name='Python', slug='python'))
+    peek_page, compress = pagecache.peek_page, pagecache.compress
+    on_loop = []
+    def peek(request, groups):
+        on_loop.append(('peek', _on_loop()))
+        return peek_page(request, groups)
+    def compress_page(content):
+        on_loop.append(('compress', _on_loop()))
+        return compress(content)
+    monkeypatch.setattr(pagecache, 'peek_page', peek)
+    monkeypatch.setattr(pagecache, 'compress', compress_page)
+
+    # A miss renders the page and compresses it as it's cached; a hit only looks it up.
+    assert async_get(url).status_code == 200
+    assert async_get(url).status_code == 200
+    assert on_loop == [('peek', False), ('compress', False), ('peek', False)]
+
+
+@pytest.mark.django_db
+def test_conditional_get(async_get, post_factory, settings):
+    # Sessions skip the page cache, leaving 304s to the validators.
+    post_factory.create()
+    etag = async_get('/')['ETag']
+    response = async_get('/', headers={
+        'If-None-Match': etag,
+        'Cookie': f'{settings.SESSION_COOKIE_NAME}=x',
+    })
+    assert response.status_code == 304
@@ -0,0 +1,109 @@
+import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+import pytest
+from ..utils import tz_datetime
+from ...context_processors import ARCHIVE_LINKS_CACHE_KEY, get_archive_links
+from ...models import Post
+
+
+@pytest.fixture
+def editor_client(client):
+    """A client whose session keeps the page cache out of the way."""
+    client.cookies[settings.SESSION_COOKIE_NAME] = 'abc'
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/', '/2021/', '/2021/06/', '/2021/06/a-post/'])
+def test_validators_set(client, post_factory, url):
+    post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='a-post')
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header('ETag')
+    assert response.has_header('Last-Modified')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/', '/2021/06/', '/2021/06/a-post/'])
+def test_if_none_match(editor_client, post_factory, django_assert_max_num_queries, url):
+    post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='a-post')
+    etag = editor_client.get(url)['ETag']
+    # At most an existence check, the key query and the sidebar; no posts or rendering.
+    with django_assert_max_num_queries(2):
+        response = editor_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+@pytest.mark.django_db
+def test_if_modified_since(editor_client, post_factory):
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 5), slug='a-post')
+    last_modified = editor_client.get(post.get_absolute_url())['Last-Modified']
+    response = editor_client.get(post.get_absolute_url(), HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_cached_page_answers_without_queries(client, post_factory, django_assert_num_queries):
+    post_factory.create()
+    etag = client.get('/')['ETag']
+    with django_assert_num_queries(0):
+        response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_edit_changes_etag(editor_client, post_factory):
+    post = post_factory.create()
+    etag = editor_client.get('/')['ETag']
+    post.title = 'New, improved title'
+    post.save()
+    assert editor_client.get('/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_unpublish_changes_etag(editor_client, post_factory, on_commit):
+    post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 8))
+    etag = editor_client.get('/2021/06/')['ETag']
+    with on_commit():
+        post.status = Post.Status.HIDDEN
+        post.save()
+    assert editor_client.get('/2021/06/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('hide', [False, True])
+def test_removal_advances_last_modified(editor_client, post_factory, on_commit, hide):
+    post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    post = post_factory.create(published_at=tz_datetime(2021, 6, 8))
+    Post.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=2))
+    # As if the sidebar had been built an hour ago, the posts updated before it.
+    version, links, _ = get_archive_links()
+    cache.set(ARCHIVE_LINKS_CACHE_KEY, (version, links, timezone.now() - datetime.timedelta(hours=1)))
+    last_modified = editor_client.get('/')['Last-Modified']
+    with on_commit():
+        if hide:
+            post.status = Post.Status.HIDDEN
+            post.save()
+        else:
+            post.delete()
+    response = editor_client.get('/', HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200
+    assert response['Last-Modified'] != last_modified
+
+
+@pytest.mark.django_db
+def test_pages_have_distinct_etags(editor_client, post_factory):
+    posts = [post_factory.create(published_at=tz_datetime(2021, 6, day)) for day in range(1, 13)]
+    first = editor_client.get('/')
+    second = editor_client.get('/', {'before': first.context['page_obj'].older_cursor})
+    assert first['ETag'] != second['ETag']
+
+
+@pytest.mark.django_db
+def test_missing_permalink_not_modified_never(editor_client):
+    response = editor_client.get('/2021/06/nothing/', HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == 404
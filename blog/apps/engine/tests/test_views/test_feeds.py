@@ -0,0 +1,92 @@
+from xml.etree import ElementTree
+from model_bakery import baker
+import pytest
+from ..utils import tz_datetime
+from ...models import Category
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def _get_xml(client, url, **extra):
+    response = client.get(url, **extra)
+    assert response.status_code == 200
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    return response, ElementTree.fromstring(content)
+
+
+def _atom_titles(root):
+    return [entry.find(f'{ATOM}title').text for entry in root.iter(f'{ATOM}entry')]
+
+
+@pytest.mark.django_db
+def test_atom_feed(client, post_factory):
+    post_factory.create(title='Older', published_at=tz_datetime(2021, 6, 4))
+    post_factory.create(title='Newer', published_at=tz_datetime(2021, 6, 5))
+    post_factory.create_draft(title='Draft')
+    post_factory.create_hidden(title='Hidden')
+    response, root = _get_xml(client, '/feeds/atom/')
+    assert response['Content-Type'] == 'application/atom+xml; charset=utf-8'
+    assert _atom_titles(root) == ['Newer', 'Older']
+
+
+@pytest.mark.django_db
+def test_rss_feed(client, post_factory):
+    post_factory.create(title='A post')
+    response, root = _get_xml(client, '/feeds/rss/')
+    assert response['Content-Type'] == 'application/rss+xml; charset=utf-8'
+    assert [item.find('title').text for item in root.iter('item')] == ['A post']
+
+
+@pytest.mark.django_db
+def test_full_content_variant(client, post_factory):
+    content = ' '.join(['word'] * 80)
+    post_factory.create(content=content)
+    _, root = _get_xml(client, '/feeds/atom/')
+    assert root.find(f'{ATOM}entry/{ATOM}summary').text.endswith('…</p>')
+    _, root = _get_xml(client, '/feeds/atom/full/')
+    assert root.find(f'{ATOM}entry/{ATOM}summary').text == f'<p>{content}</p>'
+
+
+@pytest.mark.django_db
+def test_category_feed(client, post_factory):
+    hiking = baker.make(Category, name='Hiking', slug='hiking')
+    post_factory.create(title='Trail', categories=[hiking])
+    post_factory.create(title='Code')
+    _, root = _get_xml(client, '/categories/hiking/feeds/atom/')
+    assert root.find(f'{ATOM}title').text.endswith('Hiking')
+    assert _atom_titles(root) == ['Trail']
+    assert [c.get('term') for c in root.iter(f'{ATOM}category')] == ['Hiking']
+
+
+@pytest.mark.django_db
+def test_unknown_category_feed(client):
+    assert client.get('/categories/nothing/feeds/rss/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_feed_cached_until_published_set_changes(
+    client, post_factory, on_commit, django_assert_num_queries
+):
+    post = post_factory.create(title='First')
+    _get_xml(client, '/feeds/atom/')
+    with django_assert_num_queries(0):
+        _, root = _get_xml(client, '/feeds/atom/')
+    assert _atom_titles(root) == ['First']
+
+    with on_commit():
+        post.title = 'Renamed'
+        post.save()
+    _, root = _get_xml(client, '/feeds/atom/')
+    assert _atom_titles(root) == ['Renamed']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('header', ['ETag', 'Last-Modified'])
+def test_conditional_get(client, post_factory, django_assert_num_queries, header):
+    post_factory.create()
+    response, _ = _get_xml(client, '/feeds/atom/')
+    condition = 'HTTP_IF_NONE_MATCH' if header == 'ETag' else 'HTTP_IF_MODIFIED_SINCE'
+    with django_assert_num_queries(0):
+        response = client.get('/feeds/atom/', **{condition: response[header]})
+    assert response.status_code == 304
@@ -1,8 +1,57 @@
 import pytest
-from pytest_django.asserts import assertTemplateUsed
+from pytest_django.asserts import assertContains, assertNotContains, assertTemplateUsed
+from ..utils import tz_datetime
+from ...pagination import encode_cursor
 
 @pytest.mark.django_db
 def test_home_view(client):
     response = client.get('/')
     assert response.status_code == 200
     assertTemplateUsed(response, 'home.html')
+
+
+@pytest.mark.django_db
+def test_home_view_paginated(client, post_factory):
+    posts = [
+        post_factory.create(published_at=tz_datetime(2021, 6, day)) for day in range(1, 13)
+    ]
+    posts.reverse()
+
+    response = client.get('/')
+    page = response.context['page_obj']
+    assert list(response.context['posts']) == posts[:10]
+    assertContains(response, f'?before={page.older_cursor}')
+
+    response = client.get('/', {'before': page.older_cursor})
+    page = response.context['page_obj']
+    assert list(response.context['posts']) == posts[10:]
+    assertContains(response, f'?after={page.newer_cursor}')
+    assertNotContains(response, 'Older posts')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{'before': 'bogus'}, {'before': '1_1', 'after': '1_1'}])
+def test_home_view_invalid_cursor(client, params):
+    response = client.get('/', params)
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_home_view_cursor_past_end(client, post_factory):
+    post = post_factory.create()
+    response = client.get('/', {'before': encode_cursor(post)})
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_home_view_shows_excerpts(client, post_factory):
+    long_post = post_factory.create(content=' '.join(['word'] * 50 + ['hidden']))
+    short_post = post_factory.create(content='Short and sweet')
+    response = client.get('/')
+    assertNotContains(response, 'hidden')
+    assertContains(response, 'Short and sweet')
+    assertContains(response, f'<a href="{long_post.get_absolute_url()}">Continue reading</a>', html=True)
+    assertNotContains(response, f'<a href="{short_post.get_absolute_url()}">Continue reading</a>', html=True)
+    # The full bodies are never loaded.
+    for post in response.context['posts']:
+        assert {'content', 'content_html'} <= post.get_deferred_fields()
@@ -1,5 +1,6 @@
 import datetime
 from django.urls import reverse
+from django.utils import timezone
 import pytest
 from pytest_django.asserts import assertTemplateUsed
 from ..utils import tz_datetime
@@ -76,6 +77,28 @@ def test_month_has_hidden_post(client, post_factory):
     assert [p1, p3, p2] == list(response.context['posts'])
 
 
+@pytest.mark.django_db
+def test_adjacent_months(client, post_factory):
+    post_factory.create(published_at=tz_datetime(2021, 3, 5))
+    p2 = post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    post_factory.create_hidden(published_at=tz_datetime(2021, 7, 8))
+    post_factory.create(published_at=tz_datetime(2021, 9, 8))
+    response = client.get(_get_month_archive_url(p2))
+    assert response.context['previous_month'] == datetime.date(2021, 3, 1)
+    assert response.context['next_month'] == datetime.date(2021, 9, 1)
+
+
+@pytest.mark.django_db
+def test_future_posts_excluded(client, post_factory):
+    now = timezone.now()
+    post = post_factory.create(published_at=now - datetime.timedelta(minutes=1))
+    post_factory.create(published_at=now + datetime.timedelta(minutes=1))
+    post_factory.create(published_at=now + datetime.timedelta(days=400))
+    response = client.get(_get_month_archive_url(post))
+    assert [post] == list(response.context['posts'])
+    assert response.context['next_month'] is None
+
+
 #-- Tests for conditions where a 404 response is expected --#
 
 @pytest.mark.django_db
@@ -91,3 +114,10 @@ def test_month_only_has_hidden_post(client, post_factory):
     p1 = post_factory.create_hidden(published_at=tz_datetime(2021, 6, 5))
     response = client.get(_get_month_archive_url(p1))
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_invalid_month(client, post_factory):
+    post_factory.create(published_at=tz_datetime(2021, 6, 5))
+    response = client.get('/2021/13/')
+    assert response.status_code == 404
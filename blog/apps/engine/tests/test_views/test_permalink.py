@@ -1,5 +1,6 @@
+import datetime
 import pytest
-from pytest_django.asserts import assertTemplateUsed
+from pytest_django.asserts import assertContains, assertNotContains, assertTemplateUsed
 
 
 @pytest.mark.django_db
@@ -10,6 +11,14 @@ def test_published_post(client, post_factory):
     assertTemplateUsed(response, 'permalink.html')
 
 
+@pytest.mark.django_db
+def test_published_post_shows_full_content(client, post_factory):
+    post = post_factory.create(content=' '.join(['word'] * 50 + ['ending']))
+    response = client.get(post.get_absolute_url())
+    assertContains(response, 'ending')
+    assertNotContains(response, 'Continue reading')
+
+
 @pytest.mark.django_db
 def test_hidden_post(client, post_factory):
     """For now a 404 response should be returned if the post is hidden.
@@ -20,4 +29,12 @@ def test_hidden_post(client, post_factory):
     """
     post = post_factory.create_hidden()
     response = client.get(post.get_absolute_url())
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_non_canonical_month(client, post_factory):
+    post = post_factory.create()
+    wrong_month = post.published_at - datetime.timedelta(days=40)
+    response = client.get(wrong_month.strftime(f'/%Y/%m/{post.slug}/'))
+    assert response.status_code == 404
@@ -0,0 +1,41 @@
+import pytest
+from pytest_django.asserts import assertTemplateUsed
+
+
+@pytest.mark.django_db
+def test_search_published_only(client, post_factory):
+    p1 = post_factory.create(title='Hiking the Alps')
+    post_factory.create_draft(title='Hiking drafts')
+    post_factory.create_hidden(title='Hiking hidden')
+    response = client.get('/search/', {'q': 'hiking'})
+    assert response.status_code == 200
+    assertTemplateUsed(response, 'search.html')
+    assert list(response.context['posts']) == [p1]
+
+
+@pytest.mark.django_db
+def test_search_without_query(client, post_factory):
+    post_factory.create(title='Hiking the Alps')
+    response = client.get('/search/')
+    assert response.status_code == 200
+    assert list(response.context['posts']) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query,expected', [('\x00', False), ('hiking\x00trip', False), ('\x00hiking', True)])
+def test_search_ignores_control_characters(client, admin_client, post_factory, query, expected):
+    p1 = post_factory.create(title='Hiking the Alps')
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200
+    assert list(response.context['posts']) == ([p1] if expected else [])
+    response = admin_client.get('/admin/engine/post/', {'q': query})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_index(admin_client, post_factory):
+    p1 = post_factory.create(title='Hiking the Alps')
+    post_factory.create(title='Baseball')
+    response = admin_client.get('/admin/engine/post/', {'q': 'hiking'})
+    assert response.status_code == 200
+    assert list(response.context['cl'].result_list) == [p1]
@@ -73,8 +73,27 @@ def test_year_has_hidden_post(client, post_factory):
     assert [p1, p3, p2] == list(response.context['posts'])
 
 
+@pytest.mark.django_db
+def test_adjacent_years(client, post_factory):
+    post_factory.create(published_at=tz_datetime(2019, 3, 5))
+    p2 = post_factory.create(published_at=tz_datetime(2020, 6, 5))
+    post_factory.create(published_at=tz_datetime(2020, 9, 8))
+    post_factory.create(published_at=tz_datetime(2022, 9, 8))
+    response = client.get(_get_year_archive_url(p2))
+    assert response.context['previous_year'] == datetime.date(2019, 1, 1)
+    assert response.context['next_year'] == datetime.date(2022, 1, 1)
+    assert list(response.context['date_list']) == [datetime.date(2020, 6, 1), datetime.date(2020, 9, 1)]
+
+
 #-- Tests for conditions where a 404 response is expected --#
 
+@pytest.mark.django_db
+def test_year_only_has_future_post(client, post_factory):
+    post = post_factory.create(published_at=tz_datetime(datetime.date.today().year + 2, 6, 5))
+    response = client.get(_get_year_archive_url(post))
+    assert response.status_code == 404
+
+
 @pytest.mark.django_db
 def test_year_has_no_posts(client, post_factory):
     post_factory.create(published_at=tz_datetime(2021, 6, 5))
@@ -0,0 +1,36 @@
+import logging
+from django.core.cache import cache
+from django.db import connections
+import pytest
+from ..context_processors import ARCHIVE_LINKS_CACHE_KEY
+from ..warmup import warm_up
+
+
+@pytest.mark.django_db
+def test_warm_up(client, post_factory):
+    post_factory.create()
+    assert warm_up().keys() == {'templates', 'urls', 'caches'}
+    assert cache.get(ARCHIVE_LINKS_CACHE_KEY) is not None
+    # The home page's post fragments are already cached.
+    response = client.get('/')
+    assert '_post.html' not in [template.name for template in response.templates]
+
+
+@pytest.mark.django_db
+def test_connections_closed(monkeypatch):
+    # The SQLite backend never closes the in-memory test database, so the call is checked.
+    closed = []
+    monkeypatch.setattr(connections, 'close_all', lambda: closed.append(True))
+    warm_up()
+    assert closed == [True]
+
+
+@pytest.mark.django_db
+def test_failed_step_skipped(monkeypatch, caplog):
+    def fail():
+        raise RuntimeError('Database unavailable.')
+    monkeypatch.setattr('blog.apps.engine.warmup._prime_caches', fail)
+    with caplog.at_level(logging.INFO, logger='blog.apps.engine.warmup'):
+        durations = warm_up()
+    assert 'caches' not in durations and 'templates' in durations
+    assert "Warm-up step 'caches' failed." in caplog.text
@@ -1,7 +1,10 @@
 """Provides various utilities for testing the blog engine application."""
 import datetime
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from pytest_django.asserts import assertContains, assertNotContains
+from ..querybudget import get_query_budget
 
 
 ONE_DAY_AGO = timezone.now() - datetime.timedelta(days=1)
@@ -9,18 +12,27 @@ ONE_DAY_AGO = timezone.now() - datetime.timedelta(days=1)
 
 #-- Assertions for testing page content --#
 
+def get_content(response):
+    """Gets a response's content as text; streaming responses are read in full, once."""
+    if not response.streaming:
+        return response.content.decode()
+    if not hasattr(response, 'streamed_content'):
+        response.streamed_content = b''.join(response.streaming_content).decode()
+    return response.streamed_content
+
+
 def assert_contains_post_title(response, text, header_tag='h2'):
     expected_str = f'<{header_tag}>{text}</{header_tag}>'
-    assertContains(response, expected_str)
+    assert expected_str in get_content(response)
 
 
 def assert_contains_post_permalinks(response, expected_url):
     expected_str = f'<a href="{expected_url}">Permalink</a>'
-    assertContains(response, expected_str)
+    assert expected_str in get_content(response)
 
 
 def assert_not_contains_post_categories(response):
-    assertNotContains(response, 'Posted in')
+    assert 'Posted in' not in get_content(response)
 
 
 #-- Other custom assertions --#
@@ -29,6 +41,22 @@ def assert_is_now(dt):
     assert 0 <= (timezone.now() - dt).seconds < 1
 
 
+def assert_within_query_budget(client, url):
+    """Requests a URL with an empty cache and checks it stays within its view's query budget."""
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+    budget = get_query_budget(response.resolver_match)
+    assert budget is not None, f'The view serving {url} declares no query budget.'
+    assert len(queries) <= budget, '\n'.join([
+        f'{url} made {len(queries)} queries, over its budget of {budget}:',
+        *(query['sql'] for query in queries),
+    ])
+
+
 def tz_datetime(year, month, day, hour=0, minute=0, second=0):
     """
     Creates a datetime.datetime instance with the specified parameters and a 
@@ -1,14 +1,147 @@
+import datetime
+from functools import update_wrapper
+import hashlib
+import itertools
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.views.generic import ListView, DateDetailView, MonthArchiveView, YearArchiveView
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.generic import ListView, DateDetailView, MonthArchiveView, View, YearArchiveView
 from django.views.generic.detail import DetailView
+from . import pagecache, sitemaps
+from .feeds import FEED_CLASSES
+from .context_processors import get_archive_links
 from .models import Category, Post
+from .pagination import InvalidCursor, KeysetPaginator
 
 
 #-------------------#
 #-- Mixin classes --#
 #-------------------#
 
-class PublishedPostMixin:
+class PageCacheMixin:
+    """Serves anonymous reads from the page cache, keyed on the view's page groups."""
+    def dispatch(self, request, *args, **kwargs):
+        if not pagecache.is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        page_key = pagecache.get_page_key(request, self.get_page_groups())
+        response = pagecache.get_page(page_key, request)
+        if response is None:
+            return pagecache.set_page(page_key, super().dispatch(request, *args, **kwargs))
+        return self.answer_from_cache(request, response)
+
+    def get_page_groups(self):
+        """Gets the page groups whose changes the view's pages depend on."""
+        raise NotImplementedError('Subclasses of PageCacheMixin must define get_page_groups().')
+
+    @staticmethod
+    def answer_from_cache(request, response):
+        # Cached pages keep the validators they were rendered with, so conditional
+        # requests hitting the cache are answered without touching the database.
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified')),
+            response=response,
+        )
+
+
+class AsyncViewMixin:
+    """Adds as_async_view(), which serves the view natively under ASGI.
+
+    Django 3.2 has neither an async ORM nor async cache methods, so the view is
+    split where the database comes in. Page cache hits, conditional or not, are
+    answered after a lookup in the cache alone, run in a worker thread so a cache
+    across the network doesn't block the event loop. Anything else runs the sync
+    dispatch(), and renders the response, in a single sync_to_async() call;
+    rendering reads caches and compresses the page as it's cached, none of which
+    belongs on the event loop either.
+
+    """
+    @classmethod
+    def as_async_view(cls, **initkwargs):
+        sync_view = cls.as_view(**initkwargs)
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            if hasattr(self, 'get') and not hasattr(self, 'head'):
+                self.head = self.get
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Takes on the sync view's name and attributes, view_class among them.
+        return update_wrapper(view, sync_view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        if pagecache.is_cacheable_request(request):
+            peek_page = sync_to_async(pagecache.peek_page, thread_sensitive=False)
+            response = await peek_page(request, self.get_page_groups())
+            if response is not None:
+                return self.answer_from_cache(request, response)
+        return await sync_to_async(self._dispatch_rendered)(request, *args, **kwargs)
+
+    def _dispatch_rendered(self, request, *args, **kwargs):
+        response = self.dispatch(request, *args, **kwargs)
+        if not hasattr(response, 'render'):
+            return response
+        # The handler would render a template response on the event loop, even once
+        # rendered, so it's rendered here and handed over as plain content.
+        response.render()
+        detached = HttpResponse(response.content, status=response.status_code, headers=response.headers)
+        detached.cookies = response.cookies
+        return detached
+
+
+class ConditionalGetMixin:
+    """Answers conditional GET requests from cheaply computed validators.
+    
+    Validators are worked out before any posts are fetched or templates rendered, so
+    a 304 response costs at most a query over post keys and timestamps.
+
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                if etag:
+                    response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def get_validators(self):
+        """Gets an (ETag, last modified datetime) tuple for the response, either may be None."""
+        raise NotImplementedError('Subclasses of ConditionalGetMixin must define get_validators().')
+
+    @staticmethod
+    def make_etag(*parts):
+        """Builds a quoted ETag from the parts of a response's state, and the sidebar's."""
+        state = repr([*parts, get_archive_links()[0]])
+        return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+    @staticmethod
+    def make_last_modified(timestamps):
+        """Gets the last modified time of a response from its posts' update times.
+
+        Deleting or unpublishing a post would take its time off the page and wind
+        the latest one back, so the time the published set last changed, as the
+        sidebar was built after it, is taken into account too.
+
+        """
+        return max([*timestamps, get_archive_links()[2]])
+
+
+class PublishedPostMixin(PageCacheMixin, ConditionalGetMixin):
     date_field = 'published_at'
 
     def get_queryset(self):
@@ -21,22 +154,125 @@ class SinglePublishedPostMixin(PublishedPostMixin):
 
 class MultiplePublishedPostsMixin(PublishedPostMixin):
     context_object_name = 'posts'
+    paginate_by = 10
+    paginator_class = KeysetPaginator
+
+    def get_queryset(self):
+        # Lists show excerpts, so full bodies never leave the database.
+        return super().get_queryset().defer('content', 'content_html')
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginates by (published_at, id) cursors given as `before` or `after` GET params."""
+        paginator = self.paginator_class(queryset, page_size)
+        page = self._get_page(paginator)
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_listing(self):
+        """Gets the unpaginated queryset of every post the view lists."""
+        return self.get_queryset()
+
+    def get_validators(self):
+        page = self.get_key_page()
+        etag = self.make_etag(page.object_list, page.has_older, page.has_newer)
+        return etag, self.make_last_modified(key.updated_at for key in page)
+
+    def get_key_page(self):
+        """Gets the requested page of the listing's (pk, published_at, updated_at) rows.
+
+        Only the keys and timestamps of the posts are fetched, and only once.
+
+        """
+        if not hasattr(self, '_key_page'):
+            keys = self.get_listing().prefetch_related(None).values_list(
+                'pk', 'published_at', 'updated_at', named=True
+            )
+            self._key_page = self._get_page(self.paginator_class(keys, self.get_paginate_by(keys)))
+        return self._key_page
+
+    def _get_page(self, paginator):
+        before = self.request.GET.get('before')
+        after = self.request.GET.get('after')
+        try:
+            page = paginator.page(before=before, after=after)
+        except InvalidCursor as exc:
+            raise Http404(str(exc))
+        if not page and (before is not None or after is not None):
+            raise Http404('No posts beyond the given cursor.')
+        return page
+
+
+class DatedPublishedPostsMixin(MultiplePublishedPostsMixin):
+    def get_listing(self):
+        # Unlike get_dated_items(), this skips the date list and adjacent period lookups.
+        try:
+            since, until = self.get_date_range()
+        except ValueError:
+            raise Http404('Invalid date.')
+        # Nor does it check for emptiness; get_adjacent_months() does so without a query.
+        listing = self.get_queryset().filter(**{
+            f'{self.date_field}__gte': self._make_date_lookup_arg(since),
+            f'{self.date_field}__lt': self._make_date_lookup_arg(until),
+        })
+        if not self.get_allow_future():
+            listing = listing.filter(**{f'{self.date_field}__lte': timezone.now()})
+        return listing
+
+    def get_date_range(self):
+        """Gets the start and (exclusive) end dates of the period the view lists."""
+        raise NotImplementedError('Subclasses of DatedPublishedPostsMixin must define get_date_range().')
+
+    def get_months(self):
+        """Gets every month with published posts, newest first, leaving out future ones.
+
+        The sidebar lists them all from the archive summary and is nearly always
+        cached, so this rarely costs a query.
+
+        """
+        months = [link.date_obj for link in get_archive_links()[1]['all_months']]
+        if not self.get_allow_future():
+            today = timezone.localdate()
+            months = [month for month in months if month <= today]
+        return months
+
+    def get_adjacent_months(self):
+        """Gets the nearest months with published posts before and after the period listed.
+
+        Raises Http404 if the period itself has no published posts.
+
+        """
+        try:
+            since, until = self.get_date_range()
+        except ValueError:
+            raise Http404('Invalid date.')
+        months = self.get_months()
+        if not any(since <= month < until for month in months):
+            raise Http404('No posts available.')
+        return (
+            next((month for month in months if month < since), None),
+            next((month for month in reversed(months) if month >= until), None),
+        )
 
 
 #------------------#
 #-- View classes --#
 #------------------#
 
-class HomeView(MultiplePublishedPostsMixin, ListView):
+class HomeView(AsyncViewMixin, MultiplePublishedPostsMixin, ListView):
     template_name = 'home.html'
+    query_budget = 5
+
+    def get_page_groups(self):
+        return [pagecache.HOME_GROUP]
 
 
-class PostCategoryArchiveView(MultiplePublishedPostsMixin, ListView):
+class PostCategoryArchiveView(AsyncViewMixin, MultiplePublishedPostsMixin, ListView):
     allow_empty = False
+    query_budget = 7
     template_name = 'category_archive.html'
 
     def get_queryset(self):      
-        self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
+        if not hasattr(self, 'category'):
+            self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
         qs = super().get_queryset()
         return qs.filter(categories=self.category)
 
@@ -44,25 +280,212 @@ class PostCategoryArchiveView(MultiplePublishedPostsMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
         return context
+
+    def get_page_groups(self):
+        return [pagecache.category_group(self.kwargs['slug'])]
     
 
-class PostMonthArchiveView(MultiplePublishedPostsMixin, MonthArchiveView):
+class PostMonthArchiveView(AsyncViewMixin, DatedPublishedPostsMixin, MonthArchiveView):
     month_format = '%m'
+    query_budget = 5
     template_name = 'month_archive.html'
 
+    def get_page_groups(self):
+        return [pagecache.month_group(self.kwargs['year'], self.kwargs['month'])]
+
+    def get_date_range(self):
+        since = datetime.date(int(self.get_year()), int(self.get_month()), 1)
+        return since, self._get_next_month(since)
+
+    def get_dated_items(self):
+        previous_month, next_month = self.get_adjacent_months()
+        listing = self.get_listing()
+        return listing.dates(self.date_field, 'day'), listing, {
+            'month': self.get_date_range()[0],
+            'previous_month': previous_month,
+            'next_month': next_month,
+        }
 
-class PostYearArchiveView(MultiplePublishedPostsMixin, YearArchiveView):
+
+class PostYearArchiveView(AsyncViewMixin, DatedPublishedPostsMixin, YearArchiveView):
     make_object_list = True
+    query_budget = 5
     template_name = 'year_archive.html'
 
+    def get_page_groups(self):
+        return [pagecache.year_group(self.kwargs['year'])]
+
+    def get_date_range(self):
+        since = datetime.date(int(self.get_year()), 1, 1)
+        return since, self._get_next_year(since)
+
+    def get_dated_items(self):
+        previous_month, next_month = self.get_adjacent_months()
+        since, until = self.get_date_range()
+        date_list = sorted(month for month in self.get_months() if since <= month < until)
+        return date_list, self.get_listing(), {
+            'year': since,
+            'previous_year': previous_month and previous_month.replace(month=1),
+            'next_year': next_month and next_month.replace(month=1),
+        }
+
+
+class PostSearchView(ListView):
+    context_object_name = 'posts'
+    max_results = 50
+    query_budget = 4
+    template_name = 'search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        qs = Post.objects.published().search(self.query).prefetch_related('categories')
+        qs = qs.defer('content', 'content_html')
+        return qs[:self.max_results]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
 
-class PostPermalinkView(SinglePublishedPostMixin, DetailView):
+class PostPermalinkView(AsyncViewMixin, SinglePublishedPostMixin, DetailView):
+    query_budget = 5
     template_name = 'permalink.html'
 
     def get_queryset(self):
-        return super().get_queryset().filter(
-            published_at__year=int(self.kwargs['year']),
-            published_at__month=int(self.kwargs['month']),
-            slug=self.kwargs['slug']
+        # The URL pattern only matches canonical paths, so the stored one can be looked up as is.
+        return super().get_queryset().filter(path=self.request.path_info)
+
+    def get_page_groups(self):
+        return [pagecache.permalink_group(self.kwargs['slug'])]
+
+    def get_validators(self):
+        keys = self.get_queryset().prefetch_related(None).values_list('pk', 'updated_at').first()
+        if keys is None:
+            return None, None
+        return self.make_etag(keys), self.make_last_modified([keys[1]])
+
+
+class PostFeedView(PublishedPostMixin, View):
+    """Streams an Atom or RSS feed of the latest published posts.
+
+    The feed format comes from the `format` URL argument. Entries carry a summary
+    of each post unless the `variant` URL argument is 'full', in which case they
+    carry its whole content.
+
+    """
+    title = 'Blog TBA'
+    description = 'The latest posts.'
+    max_items = 50
+    query_budget = 5
+    # Posts fetched per round trip while streaming.
+    chunk_size = 10
+
+    def get(self, request, *args, **kwargs):
+        feed_class = FEED_CLASSES[self.kwargs['format']]
+        keys = self._get_keys()
+        feed = feed_class(
+            title=self.get_title(),
+            link=request.build_absolute_uri(self.get_link()),
+            description=self.get_description(),
+            feed_url=request.build_absolute_uri(),
+            updated=max((updated_at for _, updated_at in keys), default=None),
         )
-    
+        return StreamingHttpResponse(feed.stream(self.get_items(keys)), content_type=feed.content_type)
+
+    def get_title(self):
+        return self.title
+
+    def get_description(self):
+        return self.description
+
+    def get_link(self):
+        return reverse('home')
+
+    def get_items(self, keys):
+        """Yields add_item() arguments for each post in the feed, loading them a few at a time."""
+        full = self.kwargs.get('variant') == 'full'
+        # Iterators skip prefetching, so the feed's categories are fetched up front instead.
+        categories = {}
+        through = Post.categories.through.objects.filter(post_id__in=[pk for pk, _ in keys])
+        for post_id, name in through.values_list('post_id', 'category__name').order_by('category__name'):
+            categories.setdefault(post_id, []).append(name)
+
+        posts = self.get_queryset().prefetch_related(None).select_related('author')
+        posts = posts.defer('content') if full else posts.defer('content', 'content_html')
+        for post in posts[:self.max_items].iterator(chunk_size=self.chunk_size):
+            link = self.request.build_absolute_uri(post.get_absolute_url())
+            yield {
+                'title': post.title,
+                'link': link,
+                'unique_id': link,
+                'description': post.content_html if full else post.excerpt_html,
+                'author_name': post.author.get_full_name() or post.author.get_username(),
+                'pubdate': post.published_at,
+                'updateddate': post.updated_at,
+                'categories': categories.get(post.pk, ()),
+            }
+
+    def get_page_groups(self):
+        return [pagecache.HOME_GROUP]
+
+    def get_validators(self):
+        keys = self._get_keys()
+        return self.make_etag(keys), self.make_last_modified(updated_at for _, updated_at in keys)
+
+    def _get_keys(self):
+        if not hasattr(self, '_keys'):
+            keys = self.get_queryset().prefetch_related(None).values_list('pk', 'updated_at')
+            self._keys = list(keys[:self.max_items])
+        return self._keys
+
+
+class CategoryFeedView(PostFeedView):
+    query_budget = 6
+    def get_queryset(self):
+        if not hasattr(self, 'category'):
+            self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
+        return super().get_queryset().filter(categories=self.category)
+
+    def get_title(self):
+        return f'{self.title}: {self.category}'
+
+    def get_description(self):
+        return f'The latest posts about {self.category}.'
+
+    def get_link(self):
+        return self.category.get_absolute_url()
+
+    def get_page_groups(self):
+        return [pagecache.category_group(self.kwargs['slug'])]
+
+
+class SitemapView(View):
+    """Streams the sitemap of every public page, or an index of sitemaps once they don't fit in one."""
+    content_type = 'application/xml; charset=utf-8'
+    query_budget = 6
+
+    def get(self, request, *args, **kwargs):
+        base_url = request.build_absolute_uri('/')
+        if sitemaps.needs_index():
+            paths = [reverse('sitemap_archives')] + [
+                reverse('sitemap_posts', kwargs={'shard': shard}) for shard in sitemaps.post_shards()
+            ]
+            content = sitemaps.stream_index(base_url, paths)
+        else:
+            content = sitemaps.stream_urlset(
+                base_url, itertools.chain(sitemaps.archive_rows(), sitemaps.post_rows())
+            )
+        return StreamingHttpResponse(content, content_type=self.content_type)
+
+
+class SitemapSectionView(SitemapView):
+    """Streams one of the sitemaps listed by the sitemap index."""
+    query_budget = 2
+    def get(self, request, *args, **kwargs):
+        if 'shard' in self.kwargs:
+            rows = sitemaps.post_rows(self.kwargs['shard'])
+        else:
+            rows = sitemaps.archive_rows()
+        content = sitemaps.stream_urlset(request.build_absolute_uri('/'), rows)
+        return StreamingHttpResponse(content, content_type=self.content_type)
@@ -0,0 +1,86 @@
+"""Warms a worker up before it takes traffic.
+
+A fresh worker compiles each template and URL pattern regex on first use, so its
+first requests are slow. With WARM_UP on, blog/wsgi.py and
+blog/asgi.py call warm_up() once the application is loaded, which does all that
+up front:
+
+    templates   compiles every template in the template DIRS, which the cached
+                loader (used whenever DEBUG is off) keeps for the worker's life
+    urls        builds the URL resolver's lookups and compiles every pattern
+    caches      primes the sidebar and the post fragments of the home page
+
+Pages themselves aren't primed, as the page cache keys them on the host name. A
+step that fails is logged and skipped: a cold worker is better than none.
+
+Database connections aren't warmed. They belong to the thread that opens them,
+which never serves a request, and an application preloaded before forking would
+hand the same sockets to every worker; those the caches step opens are closed
+once it's done.
+
+"""
+import logging
+from pathlib import Path
+import time
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+from .context_processors import get_archive_links
+from .models import Post
+from .templatetags.blogtools import render_posts
+from .views import HomeView
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Runs every warm-up step and returns how long each took, in milliseconds."""
+    durations = {}
+    for name, step in [
+        ('templates', _compile_templates),
+        ('urls', _compile_urls),
+        ('caches', _prime_caches),
+    ]:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %r failed.', name)
+            continue
+        durations[name] = (time.perf_counter() - start) * 1000
+    connections.close_all()
+    logger.info(
+        'Warmed up in %.1f ms.', sum(durations.values()), extra={'warm_up': durations}
+    )
+    return durations
+
+
+def _compile_templates():
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in map(Path, engine.engine.dirs):
+            for path in sorted(directory.glob('**/*.html')):
+                engine.get_template(path.relative_to(directory).as_posix())
+
+
+def _compile_urls():
+    resolver = get_resolver()
+    # Accessing the reverse lookups builds them for every named pattern.
+    resolver.reverse_dict
+    _compile_patterns(resolver.url_patterns)
+
+
+def _compile_patterns(patterns):
+    for pattern in patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            _compile_patterns(pattern.url_patterns)
+
+
+def _prime_caches():
+    get_archive_links()
+    posts = Post.objects.published().prefetch_related('categories').defer('content', 'content_html')
+    render_posts(posts[:HomeView.paginate_by], excerpt=True)
@@ -2,6 +2,7 @@
 ASGI config for blog project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The asgi_settings module it defaults to serves the public pages by async views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +10,13 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.asgi_settings')
 
 application = get_asgi_application()
+
+if settings.WARM_UP:
+    from blog.apps.engine.warmup import warm_up
+    warm_up()
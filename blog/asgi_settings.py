@@ -0,0 +1,4 @@
+from .settings import *
+
+# ASGI deployment overrides of project settings
+ROOT_URLCONF = 'blog.asgi_urls'
@@ -0,0 +1,4 @@
+"""URL patterns for ASGI deployments, where the public pages are served by async views."""
+from blog.urls import get_urlpatterns
+
+urlpatterns = get_urlpatterns(asynchronous=True)
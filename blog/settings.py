@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.apps.engine.servertiming.ServerTimingMiddleware',
+    'blog.apps.engine.replicas.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -110,5 +112,24 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Server-Timing instrumentation; see blog.apps.engine.servertiming
+
+SERVER_TIMING = False
+
+SERVER_TIMING_LOG = False
+
+# Read replicas, listed by database alias; see blog.apps.engine.replicas. They need
+# a default cache shared between workers, unlike the local memory one used here.
+
+DATABASE_ROUTERS = ['blog.apps.engine.replicas.PrimaryReplicaRouter']
+
+DATABASE_REPLICAS = []
+
+REPLICA_PIN_SECONDS = 10
+
+# Warm-up of workers as the WSGI/ASGI application loads; see blog.apps.engine.warmup
+
+WARM_UP = False
+
 
 from .local_settings import *
@@ -1,4 +1,10 @@
 from .settings import *
 
 # Test environment overrides of project settings
-# --None currently--
+
+# A stand-in read replica: a second SQLite database, which tests enable through
+# DATABASE_REPLICAS and fill by hand to play replication.
+DATABASES = {
+    **DATABASES,
+    'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3'},
+}
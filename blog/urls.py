@@ -2,27 +2,50 @@ from django.contrib import admin
 from django.urls import path, re_path
 from blog.apps.engine import views as core_views
 
-urlpatterns = [
-    re_path(
-        r'^(?P<year>[0-9]{4})/(?P<month>[0-9]{2})/(?P<slug>[\w-]+)/$',
-        core_views.PostPermalinkView.as_view(), 
-        name='permalink'
-    ),
-    re_path(
-        r'^(?P<year>[0-9]{4})/(?P<month>[0-9]{2})/$',
-        core_views.PostMonthArchiveView.as_view(), 
-        name='month_archive'
-    ),
-    re_path(
-        r'^(?P<year>[0-9]{4})/$',
-        core_views.PostYearArchiveView.as_view(), 
-        name='year_archive'
-    ),
-    path(
-        'categories/<slug:slug>/', 
-        core_views.PostCategoryArchiveView.as_view(), 
-        name='category_archive'
-    ),
-    path('admin/', admin.site.urls),
-    path('', core_views.HomeView.as_view(), name='home'),
-]
+
+def get_urlpatterns(asynchronous=False):
+    """Builds the URL patterns, with the public pages served by async views if asynchronous."""
+    def public_view(view_class):
+        return view_class.as_async_view() if asynchronous else view_class.as_view()
+
+    return [
+        re_path(
+            r'^(?P<year>[0-9]{4})/(?P<month>[0-9]{2})/(?P<slug>[\w-]+)/$',
+            public_view(core_views.PostPermalinkView),
+            name='permalink'
+        ),
+        re_path(
+            r'^(?P<year>[0-9]{4})/(?P<month>[0-9]{2})/$',
+            public_view(core_views.PostMonthArchiveView),
+            name='month_archive'
+        ),
+        re_path(
+            r'^(?P<year>[0-9]{4})/$',
+            public_view(core_views.PostYearArchiveView),
+            name='year_archive'
+        ),
+        path(
+            'categories/<slug:slug>/', 
+            public_view(core_views.PostCategoryArchiveView),
+            name='category_archive'
+        ),
+        re_path(
+            r'^categories/(?P<slug>[-a-zA-Z0-9_]+)/feeds/(?P<format>atom|rss)/(?:(?P<variant>full)/)?$',
+            core_views.CategoryFeedView.as_view(),
+            name='category_feed'
+        ),
+        re_path(
+            r'^feeds/(?P<format>atom|rss)/(?:(?P<variant>full)/)?$',
+            core_views.PostFeedView.as_view(),
+            name='feed'
+        ),
+        path('search/', core_views.PostSearchView.as_view(), name='search'),
+        path('sitemap.xml', core_views.SitemapView.as_view(), name='sitemap'),
+        path('sitemap-archives.xml', core_views.SitemapSectionView.as_view(), name='sitemap_archives'),
+        path('sitemap-posts-<int:shard>.xml', core_views.SitemapSectionView.as_view(), name='sitemap_posts'),
+        path('admin/', admin.site.urls),
+        path('', public_view(core_views.HomeView), name='home'),
+    ]
+
+
+urlpatterns = get_urlpatterns()